@@ -174,6 +174,19 @@ def _ensure_tables(conn: sqlite3.Connection) -> None:
     if "is_stale" not in existing:
         conn.execute("ALTER TABLE amazon_channels ADD COLUMN is_stale INTEGER DEFAULT 0")
 
+    # Service lookups join live channels by GTI; cover that with a partial index
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_amazon_channels_gti "
+        "ON amazon_channels(gti, channel_id) WHERE is_stale = 0"
+    )
+    # amazon_services is owned by the server; index it only once it exists
+    cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='amazon_services'")
+    if cur.fetchone():
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_amazon_services_channel "
+            "ON amazon_services(amazon_channel_id)"
+        )
+
     conn.commit()
 
 def _detect_columns(conn: sqlite3.Connection, table: str) -> List[str]:
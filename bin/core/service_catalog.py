@@ -10,6 +10,8 @@ Priority scales:
   DEFAULT_USER_PRIORITY: 1-100, higher = more preferred (user-facing defaults)
 """
 
+from functools import lru_cache
+
 # ---------------------------------------------------------------------------
 # Service Display Names
 # Maps logical service codes -> human-readable names
@@ -102,8 +104,12 @@ DISPLAY_NAMES: dict[str, str] = {
 }
 
 
+@lru_cache(maxsize=256)
 def get_display_name(service_code: str) -> str:
-    """Return human-readable name for a service code, falling back to uppercased code."""
+    """Return human-readable name for a service code, falling back to uppercased code.
+
+    Cached: DISPLAY_NAMES is static, and unknown codes repeat across listings.
+    """
     return DISPLAY_NAMES.get(service_code, service_code.upper())
 
 
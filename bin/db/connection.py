@@ -6,6 +6,10 @@ Single entry point for all DB access.  Provides:
   - get_conn()  : context manager (with get_conn() as conn: ...)
   - resolve_db_path() : locate the database file
   - db_exists() : fast existence check
+  - tune()      : apply the standard pragmas to a connection opened elsewhere
+
+Connections are tuned for the read-heavy server workload: WAL so readers
+never block on the ingest writers, plus a 64 MB page cache and mmap.
 """
 
 import os
@@ -28,6 +32,20 @@ def db_exists() -> bool:
     return resolve_db_path().exists()
 
 
+def tune(conn: sqlite3.Connection) -> None:
+    """Apply per-connection pragmas (journal_mode=WAL persists in the file)."""
+    try:
+        conn.execute("PRAGMA journal_mode=WAL;")
+    except sqlite3.OperationalError:
+        # Switching modes needs a moment of exclusive access; another
+        # connection will set it, and WAL sticks once set
+        pass
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-65536;")  # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456;")
+
+
 @contextmanager
 def get_conn(db_path: Optional[Path] = None, row_factory=sqlite3.Row):
     """
@@ -47,6 +65,7 @@ def get_conn(db_path: Optional[Path] = None, row_factory=sqlite3.Row):
 
     conn = sqlite3.connect(str(path))
     conn.row_factory = row_factory
+    tune(conn)
     try:
         yield conn
     finally:
@@ -66,6 +85,7 @@ def get_conn_or_none(db_path: Optional[Path] = None, row_factory=sqlite3.Row):
 
     conn = sqlite3.connect(str(path))
     conn.row_factory = row_factory
+    tune(conn)
     try:
         yield conn
     finally:
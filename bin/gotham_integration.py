@@ -25,6 +25,9 @@ from typing import List, Dict, Any, Optional
 from urllib.parse import urlencode, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from time_utils import utc_to_ms
 
 # Configure logging
 logging.basicConfig(
@@ -43,6 +46,17 @@ LOGICAL_SERVICE = "gotham"
 SERVICE_NAME = "Gotham Sports"
 SERVICE_PRIORITY = 20  # Similar to specialty sports services
 
+# EPG endpoint; filled per channel via str.format_map in fetch_channel_epg
+EPG_URL_TEMPLATE = (
+    BASE_API_URL + "/content/epg"
+    "?reg={zone}"
+    "&dt=androidtv"
+    "&channel={channel_id}"
+    "&client=game-gotham-androidtv"
+    "&start={start}"
+    "&end={end}"
+)
+
 # Channel definitions for zone-1 (NYC metro) - MSG and YES
 ZONE_1_CHANNELS = {
     "MSG": {
@@ -72,6 +86,33 @@ ZONE_1_CHANNELS = {
     },
 }
 
+# Flat (channel_id, name) pairs derived from ZONE_1_CHANNELS for the scrape loop
+ZONE_1 = tuple((info["channelId"], info["name"]) for info in ZONE_1_CHANNELS.values())
+
+
+def _build_session() -> requests.Session:
+    """Create a shared session whose pool can hold one connection per channel"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=max(len(ZONE_1_CHANNELS), 8))
+    session.mount("https://", adapter)
+    return session
+
+
+# Single session so channel fetches reuse warm keep-alive connections
+_SESSION = _build_session()
+
+
+def _warm_api_connection() -> None:
+    """Open the DNS/TLS connection to the API host before the channel fan-out.
+
+    get_gotham_config() only warms config.gothamsports.com; failures here are
+    irrelevant since the real requests will simply connect on their own.
+    """
+    try:
+        _SESSION.head(f"{BASE_API_URL}/health", timeout=5)
+    except Exception as e:
+        logger.debug(f"API warmup request failed (ignored): {e}")
+
 
 def _base_headers(rsn_id: str) -> Dict[str, str]:
     """Generate base headers for Gotham API requests"""
@@ -89,7 +130,7 @@ def _api_get(path: str, params: Dict[str, Any], rsn_id: str, timeout: int = 30)
     full_url = f"{url}?{qs}" if qs else url
 
     try:
-        resp = requests.get(full_url, headers=_base_headers(rsn_id), timeout=timeout)
+        resp = _SESSION.get(full_url, headers=_base_headers(rsn_id), timeout=timeout)
         resp.raise_for_status()
         return resp.json()
     except Exception as e:
@@ -100,7 +141,7 @@ def _api_get(path: str, params: Dict[str, Any], rsn_id: str, timeout: int = 30)
 def get_gotham_config() -> str:
     """Fetch RSNid from Gotham Sports configuration"""
     try:
-        response = requests.get(
+        response = _SESSION.get(
             CONFIG_URL,
             headers={"User-Agent": "okhttp/4.9.0"},
             timeout=30
@@ -120,32 +161,37 @@ def get_gotham_config() -> str:
         raise
 
 
+def _format_api_time(dt: datetime) -> str:
+    """Format datetime as the API's YYYY-MM-DDTHH:MM:SSZ (avoids strftime)"""
+    return (
+        f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+        f"T{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}Z"
+    )
+
+
 def fetch_channel_epg(
     channel_id: str,
     channel_name: str,
     zone: str,
-    start_dt: datetime,
-    end_dt: datetime,
+    start_str: str,
+    end_str: str,
     rsn_id: str
 ) -> List[Dict[str, Any]]:
-    """Fetch EPG data for a specific channel"""
-    # Format timestamps for API
-    start_str = start_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-    end_str = end_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-
-    url = (
-        f"{BASE_API_URL}/content/epg"
-        f"?reg={zone}"
-        f"&dt=androidtv"
-        f"&channel={channel_id}"
-        f"&client=game-gotham-androidtv"
-        f"&start={start_str}"
-        f"&end={end_str}"
-    )
+    """Fetch EPG data for a specific channel
+
+    start_str/end_str are pre-formatted API timestamps (see _format_api_time),
+    computed once by the caller since they are shared by every channel.
+    """
+    url = EPG_URL_TEMPLATE.format_map({
+        "zone": zone,
+        "channel_id": channel_id,
+        "start": start_str,
+        "end": end_str,
+    })
 
     try:
         logger.info(f"Fetching EPG for {channel_name}...")
-        response = requests.get(url, headers=_base_headers(rsn_id), timeout=30)
+        response = _SESSION.get(url, headers=_base_headers(rsn_id), timeout=30)
         response.raise_for_status()
 
         data = response.json()
@@ -175,13 +221,17 @@ def fetch_channel_epg(
         return []
 
 
-def _parse_iso(dt_str: Optional[str]) -> Optional[datetime]:
-    """Parse ISO8601 datetime string"""
+def _iso_to_ms(dt_str: Optional[str]) -> Optional[int]:
+    """Convert ISO8601 string to milliseconds since epoch
+
+    Gotham returns UTC timestamps like 2025-01-01T19:00:00Z, optionally with
+    fractional seconds (kept to the millisecond). Unparseable input gives None.
+    """
     if not dt_str:
         return None
     try:
-        return datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-    except Exception:
+        return utc_to_ms(dt_str)
+    except (ValueError, TypeError, AttributeError):
         return None
 
 
@@ -250,16 +300,16 @@ def normalize_event(raw: Dict[str, Any], channel_name: str) -> Optional[Dict[str
         logger.warning(f"Event {external_id} missing start/end times, skipping")
         return None
 
-    # Parse datetime objects for calculations
-    start_dt = _parse_iso(start_utc)
-    end_dt = _parse_iso(end_utc)
+    # Epoch milliseconds straight from the ISO strings (no datetime round trip)
+    start_ms = _iso_to_ms(start_utc)
+    end_ms = _iso_to_ms(end_utc)
     
-    if not start_dt or not end_dt:
+    if start_ms is None or end_ms is None:
         logger.warning(f"Event {external_id} has invalid datetime format, skipping")
         return None
 
     # Calculate duration
-    runtime_secs = int((end_dt - start_dt).total_seconds())
+    runtime_secs = (end_ms - start_ms) // 1000
 
     # Sport and league info
     sport = pgm.get("spt_ty", "").title()
@@ -372,8 +422,8 @@ def normalize_event(raw: Dict[str, Any], channel_name: str) -> Optional[Dict[str
         "channel": channel_name,
         "start_utc": start_utc,
         "end_utc": end_utc,
-        "start_dt": start_dt,
-        "end_dt": end_dt,
+        "start_ms": start_ms,
+        "end_ms": end_ms,
         "runtime_secs": runtime_secs,
         "description": description or f"{sport} on {channel_name}",
         "hero_image": hero_image,
@@ -399,6 +449,7 @@ def scrape_gotham(zone: str = "zone-1", days: int = 7) -> List[Dict[str, Any]]:
 
     # Get RSN ID from config
     rsn_id = get_gotham_config()
+    _warm_api_connection()
 
     # Calculate time range
     now = datetime.now(timezone.utc)
@@ -407,19 +458,20 @@ def scrape_gotham(zone: str = "zone-1", days: int = 7) -> List[Dict[str, Any]]:
 
     logger.info(f"Scraping from {start_dt} to {end_dt}")
 
+    # Same window for every channel - format once
+    start_str = _format_api_time(start_dt)
+    end_str = _format_api_time(end_dt)
+
     # Scrape each channel
     all_events: List[Dict[str, Any]] = []
 
-    for channel_key, channel_info in ZONE_1_CHANNELS.items():
-        channel_id = channel_info["channelId"]
-        channel_name = channel_info["name"]
-
+    for channel_id, channel_name in ZONE_1:
         raw_events = fetch_channel_epg(
             channel_id=channel_id,
             channel_name=channel_name,
             zone=zone,
-            start_dt=start_dt,
-            end_dt=end_dt,
+            start_str=start_str,
+            end_str=end_str,
             rsn_id=rsn_id
         )
 
@@ -444,11 +496,135 @@ def scrape_gotham(zone: str = "zone-1", days: int = 7) -> List[Dict[str, Any]]:
 
 # ==================== DATABASE INGEST ====================
 
+# Above this many events ingest_all_events switches to the staging-table path
+BULK_INGEST_THRESHOLD = 5000
+BULK_CHUNK_SIZE = 5000
+
+EVENT_COLUMNS = (
+    "id", "pvid", "title", "title_brief", "synopsis", "synopsis_brief",
+    "channel_name", "channel_provider_id", "airing_type",
+    "genres_json", "classification_json",
+    "is_premium", "runtime_secs",
+    "start_ms", "end_ms", "start_utc", "end_utc",
+    "created_ms", "created_utc", "last_seen_utc",
+    "hero_image_url",
+)
+
+EVENT_CONFLICT_SQL = """
+    ON CONFLICT(id) DO UPDATE SET
+        title = COALESCE(excluded.title, title),
+        synopsis = COALESCE(excluded.synopsis, synopsis),
+        airing_type = COALESCE(excluded.airing_type, airing_type),
+        end_utc = COALESCE(excluded.end_utc, end_utc),
+        end_ms = COALESCE(excluded.end_ms, end_ms),
+        last_seen_utc = excluded.last_seen_utc,
+        hero_image_url = COALESCE(excluded.hero_image_url, hero_image_url),
+        genres_json = COALESCE(excluded.genres_json, genres_json)
+"""
+
+PLAYABLE_COLUMNS = (
+    "event_id", "playable_id", "provider", "logical_service", "service_name",
+    "deeplink_play", "deeplink_open", "playable_url",
+    "priority", "created_utc", "title",
+)
+
+PLAYABLE_CONFLICT_SQL = """
+    ON CONFLICT(event_id, playable_id) DO UPDATE SET
+        deeplink_play = COALESCE(excluded.deeplink_play, deeplink_play),
+        playable_url = COALESCE(excluded.playable_url, playable_url),
+        logical_service = excluded.logical_service,
+        service_name = excluded.service_name,
+        priority = excluded.priority
+"""
+
+# Full statement text built once so every call reuses the same SQL string
+EVENT_INSERT_SQL = (
+    f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(EVENT_COLUMNS))})"
+    + EVENT_CONFLICT_SQL
+)
+
+PLAYABLE_INSERT_SQL = (
+    f"INSERT INTO playables ({', '.join(PLAYABLE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(PLAYABLE_COLUMNS))})"
+    + PLAYABLE_CONFLICT_SQL
+)
+
+# "WHERE true" disambiguates the upsert clause from a join constraint
+EVENT_MERGE_SQL = (
+    f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) "
+    f"SELECT {', '.join(EVENT_COLUMNS)} FROM temp.gotham_events_staging WHERE true"
+    + EVENT_CONFLICT_SQL
+)
+
+PLAYABLE_MERGE_SQL = (
+    f"INSERT INTO playables ({', '.join(PLAYABLE_COLUMNS)}) "
+    f"SELECT {', '.join(PLAYABLE_COLUMNS)} FROM temp.gotham_playables_staging WHERE true"
+    + PLAYABLE_CONFLICT_SQL
+)
+
+IMAGE_INSERT_SQL = "INSERT OR IGNORE INTO event_images (event_id, img_type, url) VALUES (?, ?, ?)"
+
+
 def datetime_to_ms(dt: datetime) -> int:
     """Convert datetime to milliseconds since epoch"""
     return int(dt.timestamp() * 1000)
 
 
+def _event_row(event: Dict[str, Any], now_utc: str, created_ms: int) -> tuple:
+    """Build the events row for a normalized event, ordered as EVENT_COLUMNS"""
+    # Build genres JSON - ONLY include sport type (not league)
+    # League goes in channel_name and classification_json
+    genres_json = json.dumps([event['sport']])
+
+    # Build classification JSON for league
+    classification_json = json.dumps([
+        {"type": "sport", "value": event['sport']},
+        {"type": "league", "value": event['league']}
+    ])
+
+    return (
+        f"{PROVIDER_CODE}-{event['external_id']}",
+        event['external_id'],  # pvid - CRITICAL for M3U export
+        event['title'],
+        event['title'][:100] if len(event['title']) > 100 else event['title'],
+        event['description'],
+        event['description'][:200] if len(event['description']) > 200 else event['description'],
+        event['channel'],  # channel_name (e.g., "MSG", "YES Network")
+        PROVIDER_CODE,  # channel_provider_id
+        event.get('airing_type'),  # "live", "replay", "vod"
+        genres_json,
+        classification_json,
+        1 if event['is_premium'] else 0,
+        event['runtime_secs'],
+        event['start_ms'],  # Times were converted to epoch ms during normalization
+        event['end_ms'],
+        event['start_utc'],
+        event['end_utc'],
+        created_ms,
+        now_utc,
+        now_utc,
+        event['hero_image'],
+    )
+
+
+def _playable_row(event: Dict[str, Any], now_utc: str) -> tuple:
+    """Build the playables row for a normalized event, ordered as PLAYABLE_COLUMNS"""
+    return (
+        f"{PROVIDER_CODE}-{event['external_id']}",
+        f"{event['external_id']}-main",
+        PROVIDER_CODE,
+        LOGICAL_SERVICE,
+        SERVICE_NAME,
+        event['playable_url'],
+        event['playable_url'],
+        event['playable_url'],
+        SERVICE_PRIORITY,
+        now_utc,
+        event['title'],
+    )
+
+
 def ingest_event(
     conn: sqlite3.Connection,
     event: Dict[str, Any],
@@ -461,105 +637,19 @@ def ingest_event(
         True if event was inserted/updated, False if skipped
     """
     try:
-        # Build event ID
-        event_id = f"{PROVIDER_CODE}-{event['external_id']}"
-        
-        # Convert times to both formats
-        start_dt = event['start_dt']
-        end_dt = event['end_dt']
-        start_ms = datetime_to_ms(start_dt)
-        end_ms = datetime_to_ms(end_dt)
-        created_ms = datetime_to_ms(datetime.now(timezone.utc))
-        
-        # Build genres JSON - ONLY include sport type (not league)
-        # League goes in channel_name and classification_json
-        genres_json = json.dumps([event['sport']])
-        
-        # Build classification JSON for league
-        classification_json = json.dumps([
-            {"type": "sport", "value": event['sport']},
-            {"type": "league", "value": event['league']}
-        ])
-        
+        event_row = _event_row(event, now_utc, datetime_to_ms(datetime.now(timezone.utc)))
+        event_id = event_row[0]
+
         # Insert/update event
         cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO events (
-                id, pvid, title, title_brief, synopsis, synopsis_brief,
-                channel_name, channel_provider_id, airing_type,
-                genres_json, classification_json,
-                is_premium, runtime_secs,
-                start_ms, end_ms, start_utc, end_utc,
-                created_ms, created_utc, last_seen_utc,
-                hero_image_url
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                title = COALESCE(excluded.title, title),
-                synopsis = COALESCE(excluded.synopsis, synopsis),
-                airing_type = COALESCE(excluded.airing_type, airing_type),
-                end_utc = COALESCE(excluded.end_utc, end_utc),
-                end_ms = COALESCE(excluded.end_ms, end_ms),
-                last_seen_utc = excluded.last_seen_utc,
-                hero_image_url = COALESCE(excluded.hero_image_url, hero_image_url),
-                genres_json = COALESCE(excluded.genres_json, genres_json)
-        """, (
-            event_id,
-            event['external_id'],  # pvid - CRITICAL for M3U export
-            event['title'],
-            event['title'][:100] if len(event['title']) > 100 else event['title'],
-            event['description'],
-            event['description'][:200] if len(event['description']) > 200 else event['description'],
-            event['channel'],  # channel_name (e.g., "MSG", "YES Network")
-            PROVIDER_CODE,  # channel_provider_id
-            event.get('airing_type'),  # "live", "replay", "vod"
-            genres_json,
-            classification_json,
-            1 if event['is_premium'] else 0,
-            event['runtime_secs'],
-            start_ms,
-            end_ms,
-            event['start_utc'],
-            event['end_utc'],
-            created_ms,
-            now_utc,
-            now_utc,
-            event['hero_image'],
-        ))
-        
+        cur.execute(EVENT_INSERT_SQL, event_row)
+
         # Insert playable
-        playable_id = f"{event['external_id']}-main"
-        cur.execute("""
-            INSERT INTO playables (
-                event_id, playable_id, provider, logical_service, service_name,
-                deeplink_play, deeplink_open, playable_url,
-                priority, created_utc, title
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(event_id, playable_id) DO UPDATE SET
-                deeplink_play = COALESCE(excluded.deeplink_play, deeplink_play),
-                playable_url = COALESCE(excluded.playable_url, playable_url),
-                logical_service = excluded.logical_service,
-                service_name = excluded.service_name,
-                priority = excluded.priority
-        """, (
-            event_id,
-            playable_id,
-            PROVIDER_CODE,
-            LOGICAL_SERVICE,
-            SERVICE_NAME,
-            event['playable_url'],
-            event['playable_url'],
-            event['playable_url'],
-            SERVICE_PRIORITY,
-            now_utc,
-            event['title'],
-        ))
+        cur.execute(PLAYABLE_INSERT_SQL, _playable_row(event, now_utc))
         
         # Insert hero image if available
         if event['hero_image']:
-            cur.execute("""
-                INSERT OR IGNORE INTO event_images (event_id, img_type, url)
-                VALUES (?, ?, ?)
-            """, (event_id, "hero", event['hero_image']))
+            cur.execute(IMAGE_INSERT_SQL, (event_id, "hero", event['hero_image']))
         
         conn.commit()
         return True
@@ -570,17 +660,157 @@ def ingest_event(
         return False
 
 
+def _has_unique_index(conn: sqlite3.Connection, table: str, columns: tuple) -> bool:
+    """Check whether table has a full (non-partial) UNIQUE index on exactly columns"""
+    for _seq, name, unique, _origin, partial in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        if not unique or partial:
+            continue
+        indexed = {row[2] for row in conn.execute(f"PRAGMA index_info({name})").fetchall()}
+        if indexed == set(columns):
+            return True
+    return False
+
+
+def ensure_upsert_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Make sure the ON CONFLICT targets used by the ingest are backed by UNIQUE indexes
+
+    The canonical schema declares them as primary keys; older databases
+    created by other tools may not, which would make every upsert fail.
+    """
+    if not _has_unique_index(conn, "events", ("id",)):
+        logger.info("Creating missing unique index on events(id)")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_events_id ON events(id)")
+    if not _has_unique_index(conn, "playables", ("event_id", "playable_id")):
+        logger.info("Creating missing unique index on playables(event_id, playable_id)")
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_playables_pk ON playables(event_id, playable_id)"
+        )
+    conn.commit()
+
+
+def drop_secondary_indexes(conn: sqlite3.Connection) -> List[str]:
+    """
+    Drop non-unique indexes on the ingest tables for a full rebuild
+
+    Unique indexes stay since the upserts depend on them. Returns the
+    CREATE statements so restore_indexes() can rebuild them afterwards.
+    """
+    rows = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index'
+          AND tbl_name IN ('events', 'playables', 'event_images')
+          AND sql IS NOT NULL
+          AND sql NOT LIKE 'CREATE UNIQUE%'
+    """).fetchall()
+    for name, _sql in rows:
+        conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+    conn.commit()
+    logger.info(f"Dropped {len(rows)} secondary indexes for rebuild")
+    return [sql for _name, sql in rows]
+
+
+def restore_indexes(conn: sqlite3.Connection, index_sql: List[str]) -> None:
+    """Recreate indexes dropped by drop_secondary_indexes()"""
+    for sql in index_sql:
+        conn.execute(sql)
+    conn.commit()
+    logger.info(f"Recreated {len(index_sql)} secondary indexes")
+
+
+def _load_staging(
+    cur: sqlite3.Cursor,
+    table: str,
+    staging: str,
+    columns: tuple,
+    rows: List[tuple]
+) -> None:
+    """Create a TEMP copy of table's columns and fill it in BULK_CHUNK_SIZE chunks"""
+    cols = ", ".join(columns)
+    cur.execute(f"DROP TABLE IF EXISTS temp.{staging}")
+    cur.execute(f"CREATE TEMP TABLE {staging} AS SELECT {cols} FROM {table} WHERE 0")
+    sql = f"INSERT INTO temp.{staging} ({cols}) VALUES ({', '.join('?' * len(columns))})"
+    for i in range(0, len(rows), BULK_CHUNK_SIZE):
+        cur.executemany(sql, rows[i:i + BULK_CHUNK_SIZE])
+
+
+def ingest_bulk(
+    conn: sqlite3.Connection,
+    events: List[Dict[str, Any]],
+    now_utc: str
+) -> Dict[str, int]:
+    """
+    Ingest all events in one transaction via TEMP staging tables
+
+    Rows are appended to staging tables with chunked executemany and then
+    merged with a single INSERT ... SELECT ... ON CONFLICT per table, which
+    avoids per-event statement overhead on very large refreshes.
+
+    Returns:
+        Dictionary with counts: inserted, failed
+    """
+    created_ms = datetime_to_ms(datetime.now(timezone.utc))
+    event_rows: List[tuple] = []
+    playable_rows: List[tuple] = []
+    image_rows: List[tuple] = []
+    failed = 0
+
+    for event in events:
+        try:
+            event_row = _event_row(event, now_utc, created_ms)
+            playable_row = _playable_row(event, now_utc)
+        except Exception as e:
+            logger.error(f"Failed to prepare event {event.get('external_id')}: {e}", exc_info=True)
+            failed += 1
+            continue
+        event_rows.append(event_row)
+        playable_rows.append(playable_row)
+        if event['hero_image']:
+            image_rows.append((event_row[0], "hero", event['hero_image']))
+
+    cur = conn.cursor()
+    try:
+        _load_staging(cur, "events", "gotham_events_staging", EVENT_COLUMNS, event_rows)
+        _load_staging(cur, "playables", "gotham_playables_staging", PLAYABLE_COLUMNS, playable_rows)
+
+        cur.execute(EVENT_MERGE_SQL)
+        cur.execute(PLAYABLE_MERGE_SQL)
+        for i in range(0, len(image_rows), BULK_CHUNK_SIZE):
+            cur.executemany(IMAGE_INSERT_SQL, image_rows[i:i + BULK_CHUNK_SIZE])
+
+        cur.execute("DROP TABLE IF EXISTS temp.gotham_events_staging")
+        cur.execute("DROP TABLE IF EXISTS temp.gotham_playables_staging")
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Bulk ingest failed: {e}", exc_info=True)
+        conn.rollback()
+        return {"inserted": 0, "failed": len(events)}
+
+    return {"inserted": len(event_rows), "failed": failed}
+
+
 def ingest_all_events(
     conn: sqlite3.Connection,
-    events: List[Dict[str, Any]]
+    events: List[Dict[str, Any]],
+    bulk: Optional[bool] = None
 ) -> Dict[str, int]:
     """
     Ingest all scraped events into database
+
+    Args:
+        bulk: Force (True) or disable (False) the staging-table path.
+              Defaults to bulk when there are more than BULK_INGEST_THRESHOLD events.
     
     Returns:
         Dictionary with counts: inserted, updated, failed
     """
     now_utc = datetime.now(timezone.utc).isoformat()
+
+    if bulk is None:
+        bulk = len(events) > BULK_INGEST_THRESHOLD
+    if bulk:
+        logger.info(f"Using bulk staging ingest for {len(events)} events")
+        return ingest_bulk(conn, events, now_utc)
     
     stats = {
         "inserted": 0,
@@ -618,6 +848,17 @@ def main():
         default=os.getenv("GOTHAM_ZONE", "zone-1"),
         help="DMA zone to scrape (default: zone-1 for NYC)"
     )
+    parser.add_argument(
+        "--bulk",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"Force (--bulk) or disable (--no-bulk) staging-table bulk ingest (default: auto above {BULK_INGEST_THRESHOLD} events)"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Full rebuild: drop secondary indexes during ingest and recreate them afterwards"
+    )
 
     args = parser.parse_args()
 
@@ -646,7 +887,16 @@ def main():
             sys.exit(1)
         
         conn = sqlite3.connect(str(db_path))
-        stats = ingest_all_events(conn, events)
+        ensure_upsert_indexes(conn)
+        if args.rebuild:
+            conn.execute("PRAGMA foreign_keys=OFF")
+            dropped = drop_secondary_indexes(conn)
+            try:
+                stats = ingest_all_events(conn, events, bulk=args.bulk)
+            finally:
+                restore_indexes(conn, dropped)
+        else:
+            stats = ingest_all_events(conn, events, bulk=args.bulk)
         conn.close()
         
         logger.info("=" * 60)
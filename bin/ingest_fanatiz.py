@@ -14,12 +14,20 @@ Database Schema:
 """
 
 import argparse
+import hashlib
 import json
 import logging
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+from time_utils import utc_to_ms
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +35,105 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Hot-path SQL kept as module constants so every call reuses the same text and
+# hits sqlite3's per-connection statement cache instead of re-parsing. With
+# cached_statements=256 these stay prepared for the whole run, which is what
+# SQLITE_PREPARE_PERSISTENT would buy via apsw without a second DB backend.
+EVENT_EXISTS_SQL = 'SELECT id, raw_hash FROM events WHERE id = ?'
+
+# Unchanged events (same raw_hash) only get their last_seen_utc bumped
+EVENT_TOUCH_SQL = 'UPDATE events SET last_seen_utc = ? WHERE id = ?'
+
+EVENT_UPDATE_SQL = '''
+    UPDATE events SET
+        title = ?,
+        title_brief = ?,
+        synopsis = ?,
+        synopsis_brief = ?,
+        channel_name = ?,
+        genres_json = ?,
+        start_utc = ?,
+        end_utc = ?,
+        start_ms = ?,
+        end_ms = ?,
+        runtime_secs = ?,
+        hero_image_url = COALESCE(?, hero_image_url),
+        last_seen_utc = ?,
+        raw_attributes_json = ?,
+        raw_hash = ?
+    WHERE id = ?
+'''
+
+EVENT_INSERT_SQL = '''
+    INSERT INTO events (
+        id, pvid, title, title_brief, synopsis, synopsis_brief,
+        channel_name, channel_provider_id,
+        genres_json, is_premium,
+        runtime_secs, start_ms, end_ms, start_utc, end_utc,
+        created_ms, created_utc, hero_image_url, last_seen_utc,
+        raw_attributes_json, raw_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Playables are upserted on the (event_id, playable_id) primary key and stale
+# ids pruned afterwards, so unchanged rows are rewritten in place rather than
+# deleted and re-inserted on every run. created_utc keeps its first value.
+PLAYABLE_UPSERT_SQL = '''
+    INSERT INTO playables (
+        event_id, playable_id, provider, logical_service,
+        deeplink_play, playable_url, http_deeplink_url,
+        title, locale, priority, created_utc
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(event_id, playable_id) DO UPDATE SET
+        provider = excluded.provider,
+        logical_service = excluded.logical_service,
+        deeplink_play = excluded.deeplink_play,
+        playable_url = excluded.playable_url,
+        http_deeplink_url = excluded.http_deeplink_url,
+        title = excluded.title,
+        locale = excluded.locale,
+        priority = excluded.priority
+'''
+
+STUB_PLAYABLE_UPSERT_SQL = '''
+    INSERT INTO playables (
+        event_id, playable_id, provider, logical_service,
+        deeplink_play, playable_url, http_deeplink_url,
+        title, priority, created_utc
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(event_id, playable_id) DO UPDATE SET
+        provider = excluded.provider,
+        logical_service = excluded.logical_service,
+        deeplink_play = excluded.deeplink_play,
+        playable_url = excluded.playable_url,
+        http_deeplink_url = excluded.http_deeplink_url,
+        title = excluded.title,
+        priority = excluded.priority
+'''
+
+IMAGE_INSERT_SQL = '''
+    INSERT OR IGNORE INTO event_images (event_id, img_type, url)
+    VALUES (?, ?, ?)
+'''
+
+HERO_IMAGE_PROMOTE_SQL = '''
+    UPDATE events
+       SET hero_image_url = COALESCE(
+           (SELECT NULLIF(url, '')
+              FROM event_images
+             WHERE event_id = ?
+               AND img_type IN ('hero','team_home','team_away')
+             ORDER BY CASE img_type
+                 WHEN 'hero' THEN 1
+                 WHEN 'team_home' THEN 2
+                 ELSE 3
+             END
+             LIMIT 1),
+           ?)
+     WHERE id = ?
+       AND (hero_image_url IS NULL OR hero_image_url = '')
+'''
+
 
 class FanatizIngestor:
     """Ingest Fanatiz events into FruitDeepLinks database"""
@@ -36,11 +143,26 @@ class FanatizIngestor:
     PRIORITY = 20  # Specialty soccer service
     DEFAULT_FAVICON = "https://watch.fanatiz.com/favicon.ico"
     
-    def __init__(self, db_path: str):
-        """Initialize with database connection"""
+    def __init__(self, db_path: str, full_rebuild: bool = False):
+        """Initialize with database connection
+
+        Args:
+            db_path: Path to fruit_events.db
+            full_rebuild: Keep the rollback journal in memory for the load (restored to WAL on close)
+        """
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        self.full_rebuild = full_rebuild
+        self.conn = sqlite3.connect(db_path, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
+        self._set_journal_mode("WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute("PRAGMA temp_store=MEMORY;")
+        self.conn.execute("PRAGMA cache_size=-65536;")  # 64 MB page cache
+        self.conn.execute("PRAGMA mmap_size=268435456;")
+        if full_rebuild:
+            # A memory journal still supports rollback; after a crash the
+            # load is simply re-run from the JSON
+            self._set_journal_mode("MEMORY")
         
         self.stats = {
             'events_processed': 0,
@@ -53,6 +175,32 @@ class FanatizIngestor:
         }
         self.skip_samples: List[str] = []
         self.timestamp_parse_failures = set()
+        self._set_run_clock()
+        self._ensure_schema()
+    
+    def _set_journal_mode(self, mode: str):
+        """Switch journal mode, tolerating a DB another process has locked"""
+        try:
+            self.conn.execute(f"PRAGMA journal_mode={mode};")
+        except sqlite3.OperationalError as e:
+            # Switching needs a moment of exclusive access; keep the current mode
+            logger.warning(f"Could not set journal_mode={mode}: {e}")
+    
+    def _ensure_schema(self):
+        """Add the raw_hash column used to skip unchanged events"""
+        try:
+            cols = {row['name'] for row in self.conn.execute("PRAGMA table_info(events)")}
+            if cols and 'raw_hash' not in cols:
+                self.conn.execute("ALTER TABLE events ADD COLUMN raw_hash TEXT")
+            self.conn.commit()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not ensure schema: {e}")
+    
+    def _set_run_clock(self):
+        """Capture the ingest timestamp once; reused for every event in the run"""
+        self._now = datetime.now(timezone.utc)
+        self._now_utc = self._now.strftime('%Y-%m-%dT%H:%M:%SZ')
+        self._now_ms = int(self._now.timestamp() * 1000)
     
     def ingest_from_file(self, json_path: str):
         """
@@ -62,18 +210,16 @@ class FanatizIngestor:
             json_path: Path to fanatiz_raw.json
         """
         logger.info(f"Loading events from {json_path}")
+        self._set_run_clock()
         
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        events = data.get('events', [])
-        logger.info(f"Found {len(events)} events to process")
-        
-        # Process in transaction for performance
+        # Process in transaction for performance. The JSON file is the source
+        # of truth (a crashed load is simply re-run), so skip fsyncs for the
+        # duration of the load and restore NORMAL afterwards.
+        self.conn.execute("PRAGMA synchronous=OFF;")
         try:
             self.conn.execute('BEGIN')
             
-            for event in events:
+            for event in self._iter_events(json_path):
                 try:
                     self._ingest_event(event)
                     self.stats['events_processed'] += 1
@@ -88,9 +234,28 @@ class FanatizIngestor:
             logger.error(f"Transaction failed: {e}")
             self.conn.rollback()
             raise
+        finally:
+            self.conn.execute("PRAGMA synchronous=NORMAL;")
         
         self._log_stats()
 
+    def _iter_events(self, json_path: str) -> Iterator[Dict]:
+        """
+        Yield events[] from the feed one at a time
+        
+        Streams with ijson when installed so only the current event is held
+        in memory; otherwise falls back to loading the whole file.
+        """
+        if ijson is not None:
+            with open(json_path, 'rb') as f:
+                yield from ijson.items(f, 'events.item', use_float=True)
+            return
+        
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        logger.info(f"Found {len(data.get('events', []))} events to process")
+        yield from data.get('events', [])
+
     def _record_old_event_skip(self, message: str):
         """Track skipped old events without flooding the logs."""
         self.stats['old_events_skipped'] += 1
@@ -115,7 +280,7 @@ class FanatizIngestor:
         if start_utc:
             try:
                 start_dt = datetime.fromisoformat(start_utc.replace('Z', '+00:00'))
-                days_since_start = (datetime.now(timezone.utc) - start_dt).total_seconds() / 86400
+                days_since_start = (self._now - start_dt).total_seconds() / 86400
                 
                 # Skip events that started 2+ days ago with no end time
                 if days_since_start > 2 and not end_utc:
@@ -128,7 +293,7 @@ class FanatizIngestor:
                 if end_utc:
                     try:
                         end_dt = datetime.fromisoformat(end_utc.replace('Z', '+00:00'))
-                        days_since_end = (datetime.now(timezone.utc) - end_dt).total_seconds() / 86400
+                        days_since_end = (self._now - end_dt).total_seconds() / 86400
                         if days_since_end > 1:
                             self._record_old_event_skip(
                                 f"{event_id} (ended {days_since_end:.1f} days ago)"
@@ -161,12 +326,14 @@ class FanatizIngestor:
         end_ms = self._utc_to_ms(end_utc)
         runtime_secs = int((end_ms - start_ms) / 1000) if start_ms and end_ms else 7200
         
-        # Current timestamp
-        now_utc = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
-        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        # Current timestamp (captured once per run)
+        now_utc = self._now_utc
+        now_ms = self._now_ms
         
         # Build title using full team names from metadata if available
         metadata = event.get('metadata', {})
+        # Serialized once; shared by the UPDATE and INSERT branches below
+        raw_attrs_json = json.dumps(metadata, ensure_ascii=False, separators=(',', ':'))
         hero_image_url = (event.get('hero_image_url') or event.get('hero_image') or '').strip()
 
         home_team_full = metadata.get('home_team')
@@ -201,36 +368,34 @@ class FanatizIngestor:
         # The tournament name could be enhanced later if needed
         channel_name = "Fanatiz Soccer"
         
+        # Brief variants shared by both branches; slicing a shorter str is a no-op
+        title_brief = title[:50]
+        synopsis_brief = synopsis[:100]
+        
+        # Fingerprint everything the UPDATE would write (bar last_seen_utc) so
+        # re-runs over an unchanged feed skip rewriting the row
+        raw_hash = hashlib.blake2b(
+            json.dumps(
+                [title, synopsis, genres_json, start_utc, end_utc, hero_image_url, raw_attrs_json],
+                ensure_ascii=False, separators=(',', ':'),
+            ).encode('utf-8'),
+            digest_size=16,
+        ).hexdigest()
+        
         # Check if event exists
-        existing = self.conn.execute(
-            'SELECT id FROM events WHERE id = ?',
-            (event_id,)
-        ).fetchone()
+        existing = self.conn.execute(EVENT_EXISTS_SQL, (event_id,)).fetchone()
         
-        if existing:
+        if existing and existing['raw_hash'] == raw_hash:
+            self.conn.execute(EVENT_TOUCH_SQL, (now_utc, event_id))
+            self.stats['events_updated'] += 1
+            
+        elif existing:
             # Update existing event
-            self.conn.execute('''
-                UPDATE events SET
-                    title = ?,
-                    title_brief = ?,
-                    synopsis = ?,
-                    synopsis_brief = ?,
-                    channel_name = ?,
-                    genres_json = ?,
-                    start_utc = ?,
-                    end_utc = ?,
-                    start_ms = ?,
-                    end_ms = ?,
-                    runtime_secs = ?,
-                    hero_image_url = COALESCE(?, hero_image_url),
-                    last_seen_utc = ?,
-                    raw_attributes_json = ?
-                WHERE id = ?
-            ''', (
+            self.conn.execute(EVENT_UPDATE_SQL, (
                 title,
-                title[:50] if len(title) > 50 else title,
+                title_brief,
                 synopsis,
-                synopsis[:100] if len(synopsis) > 100 else synopsis,
+                synopsis_brief,
                 channel_name,
                 genres_json,
                 start_utc,
@@ -240,29 +405,21 @@ class FanatizIngestor:
                 runtime_secs,
                 (hero_image_url or None),
                 now_utc,
-                json.dumps(metadata),
+                raw_attrs_json,
+                raw_hash,
                 event_id
             ))
             self.stats['events_updated'] += 1
             
         else:
             # Insert new event
-            self.conn.execute('''
-                INSERT INTO events (
-                    id, pvid, title, title_brief, synopsis, synopsis_brief,
-                    channel_name, channel_provider_id,
-                    genres_json, is_premium,
-                    runtime_secs, start_ms, end_ms, start_utc, end_utc,
-                    created_ms, created_utc, hero_image_url, last_seen_utc,
-                    raw_attributes_json
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            self.conn.execute(EVENT_INSERT_SQL, (
                 event_id,
                 external_id,  # CRITICAL: pvid required for M3U export
                 title,
-                title[:50] if len(title) > 50 else title,
+                title_brief,
                 synopsis,
-                synopsis[:100] if len(synopsis) > 100 else synopsis,
+                synopsis_brief,
                 channel_name,
                 self.PROVIDER,  # channel_provider_id
                 genres_json,
@@ -276,7 +433,8 @@ class FanatizIngestor:
                 now_utc,
                 (hero_image_url or None),
                 now_utc,
-                json.dumps(metadata)
+                raw_attrs_json,
+                raw_hash
             ))
             self.stats['events_inserted'] += 1
         
@@ -288,60 +446,36 @@ class FanatizIngestor:
             # Create stub playable for events without video entries
             self._create_stub_playable(event_id, external_id)
         
-        # Ingest images
-        if hero_image_url:
-            self._ingest_image(event_id, 'hero', hero_image_url)
-
+        # Ingest images: both feed shapes flatten to (event_id, type, url) rows
         imgs = event.get('images')
         if isinstance(imgs, list):
-            for im in imgs:
-                if not isinstance(im, dict):
-                    continue
-                itype = (im.get('type') or '').strip()
-                url = im.get('url') or im.get('src') or ''
-                if itype and url:
-                    self._ingest_image(event_id, itype, url)
+            image_rows = [
+                (event_id, (im.get('type') or '').strip(), im.get('url') or im.get('src') or '')
+                for im in imgs if isinstance(im, dict)
+            ]
+            image_rows = [r for r in image_rows if r[1] and r[2]]
         elif isinstance(imgs, dict):
             # dict style: {type: url}
-            for itype, url in imgs.items():
-                if itype and url:
-                    self._ingest_image(event_id, str(itype), str(url))
+            image_rows = [(event_id, str(itype), str(url)) for itype, url in imgs.items() if itype and url]
+        else:
+            image_rows = []
+        if hero_image_url:
+            image_rows.insert(0, (event_id, 'hero', hero_image_url))
+
+        if image_rows:
+            self._ingest_images(image_rows)
     
-    def _promote_hero_image_url(self, event_id: str) -> str:
+    def _promote_hero_image_url(self, event_id: str):
         """Backfill events.hero_image_url from event_images (or favicon fallback).
 
         Preference order: hero -> team_home -> team_away -> DEFAULT_FAVICON.
-        Only updates the events row if hero_image_url is currently NULL/empty.
+        Only updates the events row if hero_image_url is currently NULL/empty;
+        the lookup and the update run as a single statement.
         """
-        row = self.conn.execute(
-            """
-            SELECT url
-            FROM event_images
-            WHERE event_id = ?
-              AND img_type IN ('hero','team_home','team_away')
-            ORDER BY CASE img_type
-                WHEN 'hero' THEN 1
-                WHEN 'team_home' THEN 2
-                WHEN 'team_away' THEN 3
-                ELSE 9
-            END
-            LIMIT 1
-            """,
-            (event_id,),
-        ).fetchone()
-
-        url = (row['url'] if row else '') or self.DEFAULT_FAVICON
-
         self.conn.execute(
-            """
-            UPDATE events
-               SET hero_image_url = ?
-             WHERE id = ?
-               AND (hero_image_url IS NULL OR hero_image_url = '')
-            """,
-            (url, event_id),
+            HERO_IMAGE_PROMOTE_SQL,
+            (event_id, self.DEFAULT_FAVICON, event_id),
         )
-        return url
 
     def _ingest_playables(self, event_id: str, external_id: str, playables: List[Dict]):
         """
@@ -352,11 +486,9 @@ class FanatizIngestor:
             external_id: Fanatiz event ID
             playables: List of playable dicts
         """
-        # Delete existing playables for this event
-        self.conn.execute('DELETE FROM playables WHERE event_id = ?', (event_id,))
-        
-        now_utc = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        now_utc = self._now_utc
         
+        rows = []
         for idx, playable in enumerate(playables):
             playable_id = playable.get('playable_id', f"{external_id}-{idx}")
             
@@ -369,14 +501,7 @@ class FanatizIngestor:
             if locale:
                 title = f"{title} ({locale.upper()})"
             
-            # Insert playable
-            self.conn.execute('''
-                INSERT INTO playables (
-                    event_id, playable_id, provider, logical_service,
-                    deeplink_play, playable_url, http_deeplink_url,
-                    title, locale, priority, created_utc
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            rows.append((
                 event_id,
                 playable_id,
                 self.PROVIDER,
@@ -389,8 +514,12 @@ class FanatizIngestor:
                 self.PRIORITY + idx,  # Increment priority for variants
                 now_utc
             ))
-            
-            self.stats['playables_inserted'] += 1
+        
+        # Upsert all playables in one batch, then drop ids no longer in the feed
+        self.conn.executemany(PLAYABLE_UPSERT_SQL, rows)
+        self._prune_playables(event_id, [row[1] for row in rows])
+        
+        self.stats['playables_inserted'] += len(rows)
     
     def _create_stub_playable(self, event_id: str, external_id: str):
         """
@@ -403,21 +532,12 @@ class FanatizIngestor:
             event_id: FDL event ID
             external_id: Fanatiz event ID
         """
-        # Delete existing playables
-        self.conn.execute('DELETE FROM playables WHERE event_id = ?', (event_id,))
-        
-        now_utc = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        now_utc = self._now_utc
         
         # Create stub with actual Fanatiz watch URL
         stub_url = f"https://watch.fanatiz.com/event-detail?id={external_id}"
         
-        self.conn.execute('''
-            INSERT INTO playables (
-                event_id, playable_id, provider, logical_service,
-                deeplink_play, playable_url, http_deeplink_url,
-                title, priority, created_utc
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        self.conn.execute(STUB_PLAYABLE_UPSERT_SQL, (
             event_id,
             f"{external_id}-stub",
             self.PROVIDER,
@@ -429,35 +549,36 @@ class FanatizIngestor:
             self.PRIORITY,
             now_utc
         ))
+        self._prune_playables(event_id, [f"{external_id}-stub"])
         
         self.stats['playables_inserted'] += 1
     
-    def _ingest_image(self, event_id: str, img_type: str, url: str):
+    def _prune_playables(self, event_id: str, keep_ids: List[str]):
+        """Delete playables for event_id whose ids are not in keep_ids"""
+        placeholders = ",".join("?" * len(keep_ids))
+        self.conn.execute(
+            f"DELETE FROM playables WHERE event_id = ? AND playable_id NOT IN ({placeholders})",
+            (event_id, *keep_ids),
+        )
+    
+    def _ingest_images(self, rows: List[tuple]):
         """
-        Ingest an image for an event
+        Ingest images for an event in one batch
         
         Args:
-            event_id: FDL event ID
-            img_type: Image type (hero, keyart, boxart)
-            url: Image URL
+            rows: (event_id, img_type, url) tuples; img_type is hero, keyart, boxart, ...
         """
-        if not url:
-            return
+        before = self.conn.total_changes
         
         # Insert or ignore (avoid duplicates)
-        self.conn.execute('''
-            INSERT OR IGNORE INTO event_images (event_id, img_type, url)
-            VALUES (?, ?, ?)
-        ''', (event_id, img_type, url))
+        self.conn.executemany(IMAGE_INSERT_SQL, rows)
         
-        if self.conn.total_changes > 0:
-            self.stats['images_inserted'] += 1
+        self.stats['images_inserted'] += self.conn.total_changes - before
     
     def _utc_to_ms(self, utc_str: str) -> Optional[int]:
         """Convert ISO8601 UTC string to milliseconds since epoch"""
         try:
-            dt = datetime.fromisoformat(utc_str.replace('Z', '+00:00'))
-            return int(dt.timestamp() * 1000)
+            return utc_to_ms(utc_str)
         except Exception as e:
             key = (utc_str, str(e))
             if key not in self.timestamp_parse_failures:
@@ -480,6 +601,13 @@ class FanatizIngestor:
     
     def close(self):
         """Close database connection"""
+        # Refresh planner statistics (runs ANALYZE only where SQLite deems it useful)
+        try:
+            self.conn.execute("PRAGMA optimize;")
+        except sqlite3.Error:
+            pass
+        if self.full_rebuild:
+            self._set_journal_mode("WAL")
         self.conn.close()
 
 
@@ -497,6 +625,11 @@ def main():
         required=True,
         help='Path to fanatiz_raw.json'
     )
+    parser.add_argument(
+        '--full-rebuild',
+        action='store_true',
+        help='Keep the SQLite journal in memory during the load (re-run from JSON if interrupted)'
+    )
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -519,7 +652,7 @@ def main():
     
     try:
         # Create ingestor
-        ingestor = FanatizIngestor(args.db)
+        ingestor = FanatizIngestor(args.db, full_rebuild=args.full_rebuild)
         
         # Ingest events
         ingestor.ingest_from_file(args.fanatiz_json)
@@ -14,11 +14,29 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import hashlib
+import heapq
 import json
 import sqlite3
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from time_utils import utc_to_ms
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import logical service mapper
 try:
@@ -28,6 +46,48 @@ except ImportError:
     LOGICAL_SERVICE_AVAILABLE = False
     print("[KAYO] Warning: logical_service_mapper not available, logical_service will be NULL")
 
+# Mapper bound once (None when unavailable) so callers test a single name
+_map_ls = get_logical_service_for_playable if LOGICAL_SERVICE_AVAILABLE else None
+
+
+# Column order for Kayo event rows; normalize_kayo_event builds dicts with
+# exactly these keys, and the upsert SQL is frozen once at import time.
+EVENT_COLUMNS = (
+    "id", "pvid", "slug", "title", "title_brief", "synopsis", "synopsis_brief",
+    "channel_name", "channel_provider_id", "airing_type", "classification_json",
+    "genres_json", "content_segments_json", "is_free", "is_premium",
+    "runtime_secs", "start_ms", "end_ms", "start_utc", "end_utc",
+    "created_ms", "created_utc", "hero_image_url", "last_seen_utc",
+    "raw_attributes_json", "raw_hash",
+)
+# Columns left out of raw_hash: the per-run timestamps and the hash itself
+_UNHASHED_COLUMNS = frozenset(("created_utc", "last_seen_utc", "raw_hash"))
+_HASHED_COLUMNS = tuple(c for c in EVENT_COLUMNS if c not in _UNHASHED_COLUMNS)
+EVENT_UPSERT_SQL = (
+    f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(EVENT_COLUMNS))}) "
+    f"ON CONFLICT(id) DO UPDATE SET "
+    f"{', '.join(f'{c}=excluded.{c}' for c in EVENT_COLUMNS if c != 'id')}"
+)
+
+PLAYABLE_COLUMNS = (
+    "event_id", "playable_id", "provider", "logical_service", "playable_url",
+    "deeplink_play", "deeplink_open", "priority", "created_utc",
+)
+# playables is keyed on (event_id, playable_id); Kayo playable_ids embed the event id
+PLAYABLE_UPSERT_SQL = (
+    f"INSERT INTO playables ({', '.join(PLAYABLE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(PLAYABLE_COLUMNS))}) "
+    f"ON CONFLICT(event_id, playable_id) DO UPDATE SET "
+    f"{', '.join(f'{c}=excluded.{c}' for c in PLAYABLE_COLUMNS if c not in ('event_id', 'playable_id'))}"
+)
+
+# Normalized events buffered before each bulk upsert inside the transaction
+FLUSH_EVENTS = 500
+
+# Events whose stored raw_hash matches only get last_seen_utc bumped
+EVENT_TOUCH_SQL = "UPDATE events SET last_seen_utc = ? WHERE id = ?"
+
 
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Ingest Kayo feed into FruitDeepLinks DB")
@@ -43,12 +103,43 @@ def get_args() -> argparse.Namespace:
         required=True,
         help="Path to kayo_raw.json produced by kayo_scrape.py",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Normalize events in this many worker processes (default: 1, in-process)",
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Keep the SQLite journal in memory during the load (re-run from JSON if interrupted)",
+    )
     return parser.parse_args()
 
 
-def connect_db(path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(path))
+def _set_journal_mode(conn: sqlite3.Connection, mode: str) -> None:
+    """Switch journal mode, tolerating a DB another process has locked."""
+    try:
+        conn.execute(f"PRAGMA journal_mode={mode};")
+    except sqlite3.OperationalError as e:
+        # Switching needs a moment of exclusive access; keep the current mode
+        print(f"[KAYO] Could not set journal_mode={mode}: {e}")
+
+
+def connect_db(path: Path, full_rebuild: bool = False) -> sqlite3.Connection:
+    # Larger statement cache: the upsert SQL is reused for every event in the feed
+    # isolation_level=None: transactions are managed explicitly in ingest_kayo_events
+    conn = sqlite3.connect(str(path), cached_statements=256, isolation_level=None)
     conn.row_factory = sqlite3.Row
+    _set_journal_mode(conn, "WAL")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-65536;")  # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456;")
+    if full_rebuild:
+        # Source of truth is kayo_raw.json; a memory journal still lets a failed
+        # flush roll back. main() restores WAL before closing
+        _set_journal_mode(conn, "MEMORY")
     return conn
 
 
@@ -61,6 +152,8 @@ def ensure_columns(conn: sqlite3.Connection) -> None:
     missing = required - cols
     if missing:
         raise RuntimeError(f"events table is missing required columns: {sorted(missing)}")
+    if "raw_hash" not in cols:
+        cur.execute("ALTER TABLE events ADD COLUMN raw_hash TEXT")
 
     cur.execute("PRAGMA table_info(playables)")
     pcols = {row["name"] for row in cur.fetchall()}
@@ -69,9 +162,31 @@ def ensure_columns(conn: sqlite3.Connection) -> None:
     if pmissing:
         raise RuntimeError(f"playables table is missing required columns: {sorted(pmissing)}")
 
+    # bulk_upsert_playables relies on ON CONFLICT(event_id, playable_id). The canonical
+    # schema declares that pair as the PRIMARY KEY; add a unique index if an older
+    # database lacks it so the upsert cannot fail.
+    has_pk_index = False
+    for idx in cur.execute("PRAGMA index_list(playables)").fetchall():
+        if not idx["unique"] or idx["partial"]:
+            continue
+        idx_cols = {r["name"] for r in conn.execute(f"PRAGMA index_info({idx['name']})").fetchall()}
+        if idx_cols == {"event_id", "playable_id"}:
+            has_pk_index = True
+            break
+    if not has_pk_index:
+        cur.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_playables_event_playable "
+            "ON playables(event_id, playable_id)"
+        )
+
 
-def normalize_kayo_event(raw_event: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+def normalize_kayo_event(
+    raw_event: Dict[str, Any], now_iso: str | None = None
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """Convert one Kayo event JSON dict into (event_row, playable_rows).
+
+    now_iso is the ingest timestamp; callers looping over a feed should compute
+    it once and pass it in (defaults to the current time).
     
     Maps to existing FruitDeepLinks schema:
 - channel_name = "Kayo Sports" (human-friendly network label)
@@ -82,6 +197,8 @@ def normalize_kayo_event(raw_event: Dict[str, Any]) -> Tuple[Dict[str, Any], Lis
     external_id = raw_event.get("external_id")
     if not external_id:
         raise ValueError("Kayo event missing external_id")
+    if now_iso is None:
+        now_iso = datetime.now(timezone.utc).isoformat()
 
     event_id = f"kayo-{external_id}"
     title = raw_event.get("title") or external_id
@@ -128,13 +245,13 @@ def normalize_kayo_event(raw_event: Dict[str, Any]) -> Tuple[Dict[str, Any], Lis
     end_ms = None
     if start_utc and end_utc:
         try:
-            start_dt = datetime.fromisoformat(start_utc.replace('Z', '+00:00'))
-            end_dt = datetime.fromisoformat(end_utc.replace('Z', '+00:00'))
-            runtime_secs = int((end_dt - start_dt).total_seconds())
-            start_ms = int(start_dt.timestamp() * 1000)
-            end_ms = int(end_dt.timestamp() * 1000)
+            start_ms = utc_to_ms(start_utc)
+            end_ms = utc_to_ms(end_utc)
+            runtime_secs = int((end_ms - start_ms) / 1000)
         except (ValueError, AttributeError):
-            pass
+            start_ms = end_ms = None
+
+    raw_json = json.dumps(raw_event.get("raw") or {}, ensure_ascii=False, separators=(",", ":"))
 
     # Map to existing schema
     event_row: Dict[str, Any] = {
@@ -162,13 +279,20 @@ def normalize_kayo_event(raw_event: Dict[str, Any]) -> Tuple[Dict[str, Any], Lis
         "start_utc": start_utc,
         "end_utc": end_utc,
         "created_ms": None,
-        "created_utc": datetime.now(timezone.utc).isoformat(),
+        "created_utc": now_iso,
         "hero_image_url": hero_image,
-        "last_seen_utc": datetime.now(timezone.utc).isoformat(),
-        "raw_attributes_json": json.dumps(raw_event.get("raw") or {}, ensure_ascii=False),
+        "last_seen_utc": now_iso,
+        "raw_attributes_json": raw_json,
     }
+    # Fingerprint of everything the upsert would write (bar timestamps) so
+    # re-ingesting an unchanged event can skip rewriting the row
+    event_row["raw_hash"] = hashlib.blake2b(
+        json.dumps([event_row[c] for c in _HASHED_COLUMNS], ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
 
     playable_rows: List[Dict[str, Any]] = []
+    map_ls = _map_ls  # local lookup inside the playables loop
     for idx, p in enumerate(raw_event.get("playables") or []):
         playable_id = p.get("playable_id") or f"{event_id}-playable-{idx}"
         provider = p.get("provider") or "kayo"
@@ -176,11 +300,15 @@ def normalize_kayo_event(raw_event: Dict[str, Any]) -> Tuple[Dict[str, Any], Lis
         deeplink_open = p.get("deeplink_open")
         playable_url = p.get("playable_url")
         
-        # Determine logical_service using mapper
+        # Determine logical_service using mapper. The mapper returns kayo_web
+        # for every provider="kayo" playable (all of them, as scraped today),
+        # so skip the call for those.
         logical_service = None
-        if LOGICAL_SERVICE_AVAILABLE:
+        if provider == "kayo":
+            logical_service = "kayo_web"
+        elif map_ls is not None:
             try:
-                logical_service = get_logical_service_for_playable(
+                logical_service = map_ls(
                     provider=provider,
                     deeplink_play=deeplink_play,
                     deeplink_open=deeplink_open,
@@ -190,11 +318,11 @@ def normalize_kayo_event(raw_event: Dict[str, Any]) -> Tuple[Dict[str, Any], Lis
                 )
             except Exception as e:
                 print(f"[KAYO] Warning: Could not map logical_service for {playable_id}: {e}")
-                # Fallback: Kayo provider maps to kayo_web
-                logical_service = "kayo_web" if provider == "kayo" else provider
+                # Fallback: use the provider code as-is
+                logical_service = provider
         else:
-            # Fallback: Kayo provider maps to kayo_web
-            logical_service = "kayo_web" if provider == "kayo" else provider
+            # Fallback: use the provider code as-is
+            logical_service = provider
         
         playable_rows.append(
             {
@@ -206,55 +334,89 @@ def normalize_kayo_event(raw_event: Dict[str, Any]) -> Tuple[Dict[str, Any], Lis
                 "deeplink_play": deeplink_play,
                 "deeplink_open": deeplink_open,
                 "priority": p.get("priority", 10),
-                "created_utc": datetime.now(timezone.utc).isoformat(),
+                "created_utc": now_iso,
             }
         )
 
     return event_row, playable_rows
 
 
-def upsert_event(conn: sqlite3.Connection, row: Dict[str, Any]) -> None:
-    cur = conn.cursor()
-    columns = list(row.keys())
-    placeholders = ", ".join(["?"] * len(columns))
-    updates = ", ".join([f"{c}=excluded.{c}" for c in columns if c != "id"])
-    sql = f"""
-        INSERT INTO events ({", ".join(columns)})
-        VALUES ({placeholders})
-        ON CONFLICT(id) DO UPDATE SET
-        {updates}
+def _normalize_safe(
+    raw_event: Dict[str, Any], now_iso: str
+) -> Tuple[Tuple[Dict[str, Any], List[Dict[str, Any]]] | None, str | None]:
+    """normalize_kayo_event wrapper that returns errors instead of raising,
+    so one bad event cannot abort a ProcessPoolExecutor.map() stream."""
+    try:
+        return normalize_kayo_event(raw_event, now_iso), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _chunks(rows: Iterable[Any], n: int = 500) -> Iterator[List[Any]]:
+    """Yield lists of up to n items from rows."""
+    it = iter(rows)
+    while chunk := list(islice(it, n)):
+        yield chunk
+
+
+def bulk_upsert_events(conn: sqlite3.Connection, rows: Iterable[Dict[str, Any]]) -> None:
+    for chunk in _chunks(rows):
+        ids = [r["id"] for r in chunk]
+        stored = dict(conn.execute(
+            f"SELECT id, raw_hash FROM events WHERE id IN ({', '.join('?' * len(ids))})", ids
+        ).fetchall())
+        changed = [r for r in chunk if stored.get(r["id"]) != r["raw_hash"]]
+        if changed:
+            conn.executemany(EVENT_UPSERT_SQL, [tuple(r[c] for c in EVENT_COLUMNS) for r in changed])
+        if len(changed) < len(chunk):
+            conn.executemany(EVENT_TOUCH_SQL, [
+                (r["last_seen_utc"], r["id"]) for r in chunk if stored.get(r["id"]) == r["raw_hash"]
+            ])
+
+
+def bulk_upsert_playables(conn: sqlite3.Connection, rows: Iterable[Dict[str, Any]]) -> None:
+    for chunk in _chunks(rows):
+        conn.executemany(PLAYABLE_UPSERT_SQL, [tuple(r.get(c) for c in PLAYABLE_COLUMNS) for r in chunk])
+
+
+def iter_events(path: Path) -> Iterator[Any]:
+    """Yield events from kayo_raw.json one at a time.
+
+    kayo_scrape.py writes JSONL: a header object on the first line, then one
+    event per line. Older single-document files ({"events": [...]}) are still
+    accepted: a compact one is already parsed by the first readline(), while
+    a pretty-printed one streams with ijson when installed, otherwise the
+    full file is loaded with orjson (or json) in one go.
     """
-    cur.execute(sql, [row[c] for c in columns])
-
-
-def upsert_playables(conn: sqlite3.Connection, rows: Iterable[Dict[str, Any]]) -> None:
-    cur = conn.cursor()
-    for row in rows:
-        # Check if playable already exists
-        cur.execute("SELECT 1 FROM playables WHERE playable_id = ?", (row["playable_id"],))
-        exists = cur.fetchone() is not None
-        
-        if exists:
-            # Update existing
-            columns = [c for c in row.keys() if c != "playable_id"]
-            updates = ", ".join([f"{c}=?" for c in columns])
-            sql = f"UPDATE playables SET {updates} WHERE playable_id = ?"
-            cur.execute(sql, [row[c] for c in columns] + [row["playable_id"]])
-        else:
-            # Insert new
-            columns = list(row.keys())
-            placeholders = ", ".join(["?"] * len(columns))
-            sql = f"INSERT INTO playables ({', '.join(columns)}) VALUES ({placeholders})"
-            cur.execute(sql, [row[c] for c in columns])
-
-
-def ingest_kayo_events(conn: sqlite3.Connection, path: Path) -> int:
+    loads = orjson.loads if orjson is not None else json.loads
+    with path.open("rb") as f:
+        try:
+            header = loads(f.readline())
+        except ValueError:
+            header = None
+        if isinstance(header, dict):
+            if "events" in header:
+                # Legacy document on a single line: already fully parsed
+                yield from header["events"] or []
+                return
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+            return
+
+    if ijson is not None:
+        with path.open("rb") as f:
+            yield from ijson.items(f, "events.item", use_float=True)
+        return
+    data = loads(path.read_bytes())
+    yield from data.get("events") or []
+
+
+def ingest_kayo_events(conn: sqlite3.Connection, path: Path, workers: int = 1) -> int:
     if not path.exists():
         print(f"[KAYO] No file found at {path}, skipping.")
         return 0
 
-    data = json.loads(path.read_text(encoding="utf-8"))
-    events = data.get("events") or []
     # Kayo sometimes returns duplicate external_id rows (often identical copies).
     # Since our DB primary key is based on external_id, dedupe here so "last one wins"
     # doesn't produce confusing counts.
@@ -272,11 +434,15 @@ def ingest_kayo_events(conn: sqlite3.Connection, path: Path) -> int:
             _to_int(ev.get("end_ms") or ev.get("endMs")),
         )
 
-    best_by_id: dict[str, dict] = {}
-    dup_counts: dict[str, int] = {}
+    # external_id -> (score, event); the incumbent's score is kept so each
+    # duplicate is scored once
+    best_by_id: dict[str, tuple[tuple[int, int, int], dict]] = {}
+    dup_counts: Counter[str] = Counter()
     missing_id = 0
+    total = 0
 
-    for ev in events:
+    for ev in iter_events(path):
+        total += 1
         if not isinstance(ev, dict):
             continue
         eid = ev.get("external_id")
@@ -284,70 +450,111 @@ def ingest_kayo_events(conn: sqlite3.Connection, path: Path) -> int:
             missing_id += 1
             continue
         k = str(eid)
-        dup_counts[k] = dup_counts.get(k, 0) + 1
-        if k not in best_by_id or _score(ev) > _score(best_by_id[k]):
-            best_by_id[k] = ev
-
-    if best_by_id:
-        deduped = list(best_by_id.values())
-        collapsed = len(events) - len(deduped)
+        dup_counts[k] += 1
+        score = _score(ev)
+        cur = best_by_id.get(k)
+        if cur is None or score > cur[0]:
+            best_by_id[k] = (score, ev)
+
+    events = [ev for _, ev in best_by_id.values()]
+    if events:
+        collapsed = total - len(events)
         if collapsed > 0:
             dup_id_count = sum(1 for _, n in dup_counts.items() if n > 1)
-            top = sorted(((k, n) for k, n in dup_counts.items() if n > 1), key=lambda x: x[1], reverse=True)[:10]
-            print(f"[KAYO] Deduped events by external_id: {len(events)} -> {len(deduped)} (collapsed {collapsed}; dup_ids={dup_id_count})")
+            top = heapq.nlargest(10, ((k, n) for k, n in dup_counts.items() if n > 1), key=lambda x: x[1])
+            print(f"[KAYO] Deduped events by external_id: {total} -> {len(events)} (collapsed {collapsed}; dup_ids={dup_id_count})")
             if top:
                 print(f"[KAYO] Top duplicate external_id counts: {top}")
         if missing_id:
             print(f"[KAYO] Skipped {missing_id} event(s) missing external_id during dedupe.")
-        events = deduped
     if not events:
         print(f"[KAYO] File at {path} has no events[]")
         return 0
 
     print(f"[KAYO] Ingesting {len(events)} events from {path}")
     inserted = 0
+    failed = 0
+    event_rows: List[Dict[str, Any]] = []
+    all_playable_rows: List[Dict[str, Any]] = []
     skipped_old = 0
-    for raw_event in events:
-        try:
-            event_row, playable_rows = normalize_kayo_event(raw_event)
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    now_ms = int(now.timestamp() * 1000)
+    # One explicit write transaction for the whole feed (connection is in
+    # autocommit mode, so nothing is wrapped implicitly per statement).
+    # The JSON file is the source of truth, so fsyncs are skipped while loading.
+    conn.execute("PRAGMA synchronous=OFF;")
+    # Normalization is pure CPU work, so it can fan out to worker processes;
+    # all DB writes stay on this connection (SQLite has a single writer).
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    if executor:
+        normalized = executor.map(partial(_normalize_safe, now_iso=now_iso), events, chunksize=100)
+    else:
+        normalized = (_normalize_safe(raw_event, now_iso) for raw_event in events)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for result, error in normalized:
+            try:
+                if error is not None:
+                    raise ValueError(error)
+                event_row, playable_rows = result
             
-            # Skip OLD events to prevent re-importing stale historical data
-            # This matches the cleanup logic in daily_refresh.py Step 5c
-            start_utc = event_row.get("start_utc")
-            end_utc = event_row.get("end_utc")
+                # Skip OLD events to prevent re-importing stale historical data
+                # This matches the cleanup logic in daily_refresh.py Step 5c
+                start_utc = event_row.get("start_utc")
+                end_utc = event_row.get("end_utc")
             
-            if start_utc:
-                try:
-                    start_dt = datetime.fromisoformat(start_utc.replace('Z', '+00:00'))
-                    days_since_start = (datetime.now(timezone.utc) - start_dt).total_seconds() / 86400
+                if start_utc:
+                    try:
+                        start_ms = event_row.get("start_ms") or utc_to_ms(start_utc)
+                        days_since_start = (now_ms - start_ms) / 86_400_000
                     
-                    # Skip events that started 2+ days ago with no end time
-                    if days_since_start > 2 and not end_utc:
-                        skipped_old += 1
-                        continue
+                        # Skip events that started 2+ days ago with no end time
+                        if days_since_start > 2 and not end_utc:
+                            skipped_old += 1
+                            continue
                     
-                    # Skip events that ENDED more than 1 day ago
-                    if end_utc:
-                        try:
-                            end_dt = datetime.fromisoformat(end_utc.replace('Z', '+00:00'))
-                            days_since_end = (datetime.now(timezone.utc) - end_dt).total_seconds() / 86400
-                            if days_since_end > 1:
-                                skipped_old += 1
-                                continue
-                        except (ValueError, AttributeError):
-                            pass  # If parsing fails, import anyway
+                        # Skip events that ENDED more than 1 day ago
+                        if end_utc:
+                            try:
+                                end_ms = event_row.get("end_ms") or utc_to_ms(end_utc)
+                                days_since_end = (now_ms - end_ms) / 86_400_000
+                                if days_since_end > 1:
+                                    skipped_old += 1
+                                    continue
+                            except (ValueError, AttributeError):
+                                pass  # If parsing fails, import anyway
                             
-                except (ValueError, AttributeError):
-                    pass  # If parsing fails, import anyway
+                    except (ValueError, AttributeError):
+                        pass  # If parsing fails, import anyway
             
-            upsert_event(conn, event_row)
-            upsert_playables(conn, playable_rows)
-            inserted += 1
-        except Exception as e:
-            print(f"[KAYO] Error processing event: {e}")
-            continue
-
-    conn.commit()
+                event_rows.append(event_row)
+                all_playable_rows.extend(playable_rows)
+                inserted += 1
+            except Exception as e:
+                print(f"[KAYO] Error processing event: {e}")
+                failed += 1
+                continue
+            # Flush as we go so only one batch of normalized rows is held
+            if len(event_rows) >= FLUSH_EVENTS:
+                bulk_upsert_events(conn, event_rows)
+                bulk_upsert_playables(conn, all_playable_rows)
+                event_rows.clear()
+                all_playable_rows.clear()
+        bulk_upsert_events(conn, event_rows)
+        bulk_upsert_playables(conn, all_playable_rows)
+        conn.commit()
+    except Exception as e:
+        print(f"[KAYO] Transaction failed, rolling back: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        if executor:
+            executor.shutdown()
+
+    if failed > 0:
+        print(f"[KAYO] Failed to process {failed} event(s); the rest were committed")
     if skipped_old > 0:
         print(f"[KAYO] Skipped {skipped_old} old events (ended >1 day ago or started >2 days ago with no end time)")
     print(f"[KAYO] Upserted {inserted} events into DB.")
@@ -356,10 +563,22 @@ def ingest_kayo_events(conn: sqlite3.Connection, path: Path) -> int:
 
 def main() -> int:
     args = get_args()
-    conn = connect_db(args.db)
+    conn = connect_db(args.db, full_rebuild=args.full_rebuild)
     ensure_columns(conn)
+    # Row is only needed for the schema checks above; the ingest path is write-only
+    conn.row_factory = None
 
-    total_inserted = ingest_kayo_events(conn, args.kayo_json)
+    try:
+        total_inserted = ingest_kayo_events(conn, args.kayo_json, workers=args.workers)
+    finally:
+        # Refresh planner statistics (runs ANALYZE only where SQLite deems it useful)
+        try:
+            conn.execute("PRAGMA optimize;")
+        except sqlite3.Error:
+            pass
+        if args.full_rebuild:
+            _set_journal_mode(conn, "WAL")
+        conn.close()
 
     if total_inserted == 0:
         print("No Kayo events ingested.")
@@ -12,21 +12,35 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from time_utils import utc_to_datetime
 
 try:
     from curl_cffi import requests as curl_requests
 except Exception:
     curl_requests = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://api.kayosports.com.au/v3/content/types/landing/names/fixtures"
 
+# infoLine "length" values look like "4h 10m", "3h" or "54m"
+_LEN_H = re.compile(r'(\d+)h')
+_LEN_M = re.compile(r'(\d+)m')
 
 
 class KayoForbidden(Exception):
@@ -55,7 +69,8 @@ KAYO_HEADERS = {
 def _build_session():
     """Create a session with browser-like defaults.
 
-    Prefer curl_cffi when available so the TLS/client fingerprint is more browser-like.
+    Prefer curl_cffi when available so the TLS/client fingerprint is more browser-like
+    (its impersonation profile already negotiates gzip/br and keep-alive).
     Fall back to requests if curl_cffi is unavailable.
     """
     if curl_requests is not None:
@@ -63,12 +78,27 @@ def _build_session():
         session.impersonate = "chrome136"
     else:
         session = requests.Session()
+        # requests does not pick up curl_cffi's browser defaults: ask for
+        # compressed JSON explicitly and keep connections alive across days.
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        session.headers["Connection"] = "keep-alive"
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("https://", adapter)
     session.headers.update(KAYO_HEADERS)
     return session
 
 
-# Use a single session so headers + TLS settings remain consistent across requests.
-_SESSION = _build_session()
+# One session per thread so headers + TLS settings remain consistent across
+# requests; curl_cffi sessions must not be shared between threads.
+_LOCAL = threading.local()
+
+
+def _get_session():
+    session = getattr(_LOCAL, "session", None)
+    if session is None:
+        session = _LOCAL.session = _build_session()
+    return session
+
 
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Kayo Sports scraper")
@@ -106,6 +136,12 @@ def get_args() -> argparse.Namespace:
         "--sport",
         help="Optional sport filter (e.g. 'cricket'). If omitted, all sports.",
     )
+    parser.add_argument(
+        "--keep-raw",
+        action="store_true",
+        help="Store each fixture's full Kayo content payload under 'raw' "
+             "(default: only the data sections used downstream).",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -138,7 +174,7 @@ def fetch_fixtures_json(
         params["sport"] = sport
 
     logger.debug("Fetching Kayo fixtures: params=%s", params)
-    resp = _SESSION.get(BASE_URL, params=params, timeout=timeout)
+    resp = _get_session().get(BASE_URL, params=params, timeout=timeout)
     if resp.status_code == 403:
         snippet = (resp.text or "")[:300]
         raise KayoForbidden(
@@ -157,12 +193,29 @@ def fetch_fixtures_json(
     return data
 
 
-def normalize_kayo_event(content: Dict[str, Any], sport_from_panel: str) -> Dict[str, Any] | None:
+# Nested sections of content["data"] still read downstream: ingest_kayo uses
+# clickthrough/contentDisplay, xmltv_helpers checks playback.info.playbackType.
+_RAW_DATA_SECTIONS = ("clickthrough", "contentDisplay", "playback")
+
+
+def _compact_raw_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the scalar fields of a content item's data plus _RAW_DATA_SECTIONS."""
+    return {
+        k: v for k, v in data.items()
+        if k in _RAW_DATA_SECTIONS or not isinstance(v, (dict, list))
+    }
+
+
+def normalize_kayo_event(
+    content: Dict[str, Any], sport_from_panel: str, keep_raw: bool = False
+) -> Dict[str, Any] | None:
     """Convert one Kayo content item into normalized event format.
     
     Args:
         content: The content item from a panel
         sport_from_panel: The sport name from the panel title
+        keep_raw: Store the whole content item as 'raw' instead of the
+            compact subset from _compact_raw_data
     
     Returns None if the content should be skipped.
     """
@@ -230,7 +283,7 @@ def normalize_kayo_event(content: Dict[str, Any], sport_from_panel: str) -> Dict
             if len(parts) == 3:
                 hours, minutes, seconds = map(int, parts)
                 duration_delta = timedelta(hours=hours, minutes=minutes, seconds=seconds)
-                start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+                start_dt = utc_to_datetime(start_time)
                 end_dt = start_dt + duration_delta
                 end_time = end_dt.isoformat().replace('+00:00', 'Z')
         except (ValueError, AttributeError) as e:
@@ -248,24 +301,22 @@ def normalize_kayo_event(content: Dict[str, Any], sport_from_panel: str) -> Dict
         
         if length_str:
             try:
-                import re
-                
                 # Parse strings like "4h 10m", "3h", "54m"
                 hours = 0
                 minutes = 0
                 
                 # Extract hours
-                h_match = re.search(r'(\d+)h', length_str)
+                h_match = _LEN_H.search(length_str)
                 if h_match:
                     hours = int(h_match.group(1))
                 
                 # Extract minutes
-                m_match = re.search(r'(\d+)m', length_str)
+                m_match = _LEN_M.search(length_str)
                 if m_match:
                     minutes = int(m_match.group(1))
                 
                 if hours > 0 or minutes > 0:
-                    start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+                    start_dt = utc_to_datetime(start_time)
                     end_dt = start_dt + timedelta(hours=hours, minutes=minutes)
                     end_time = end_dt.isoformat().replace('+00:00', 'Z')
                     logger.debug(f"Parsed length '{length_str}' -> {hours}h {minutes}m")
@@ -274,7 +325,7 @@ def normalize_kayo_event(content: Dict[str, Any], sport_from_panel: str) -> Dict
     
     # Third try: Sport-specific duration estimates as fallback
     if not end_time and start_time:
-        start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+        start_dt = utc_to_datetime(start_time)
         
         # Sport-specific duration estimates (in hours)
         sport_durations = {
@@ -353,7 +404,7 @@ def normalize_kayo_event(content: Dict[str, Any], sport_from_panel: str) -> Dict
         "end_utc": end_time,
         "venue": venue_name,
         "hero_image": hero_image,
-        "raw": content,  # Store entire content for debugging
+        "raw": content if keep_raw else {"data": _compact_raw_data(data)},
         "playables": playables,
     }
 
@@ -363,75 +414,111 @@ def fetch_kayo_schedule(
     days: int,
     with_live: bool = True,
     sport: str | None = None,
+    keep_raw: bool = False,
 ) -> List[Dict[str, Any]]:
-    """Fetch Kayo fixtures over a date range and normalize them."""
+    """Fetch Kayo fixtures over a date range and normalize them.
+
+    The first day is fetched on its own as a probe; only if it succeeds are
+    the remaining days fetched concurrently. Workers check a shared stop
+    flag before each request, so once any day gets a 403 no further
+    requests go out. Results are processed in date order.
+    """
     all_events = []
-    
-    for offset in range(days):
-        day = start_date + timedelta(days=offset)
+    day_list = [start_date + timedelta(days=offset) for offset in range(days)]
+    forbidden = threading.Event()
+
+    def _fetch_day(day: datetime) -> Dict[str, Any] | None:
+        if forbidden.is_set():
+            return None
         logger.info(f"Fetching Kayo fixtures for {day.date().isoformat()}")
-        
         try:
-            payload = fetch_fixtures_json(
-                day=day,
-                with_live=with_live,
-                sport=sport,
-            )
+            return fetch_fixtures_json(day=day, with_live=with_live, sport=sport)
+        except KayoForbidden:
+            forbidden.set()
+            raise
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(days, 8)))
+    # Queued days are cancelled on every exit path, including Ctrl-C
+    try:
+        futures = []
+        if day_list:
+            # Probe: let day 0 finish before fanning out the rest
+            futures.append(executor.submit(_fetch_day, day_list[0]))
+            futures[0].exception()
+            if not forbidden.is_set():
+                futures.extend(executor.submit(_fetch_day, day) for day in day_list[1:])
+    
+        for day, future in zip(day_list, futures):
+            try:
+                payload = future.result()
+                if payload is None:
+                    # Skipped: another day already hit a 403
+                    logger.error("Stopping Kayo scrape for this run to avoid 403 spam.")
+                    break
             
-            # Extract fixtures from panels structure
-            # Response structure: { "panels": [ { "title": "Cricket", "contents": [...] } ] }
-            panels = payload.get("panels", [])
+                # Extract fixtures from panels structure
+                # Response structure: { "panels": [ { "title": "Cricket", "contents": [...] } ] }
+                panels = payload.get("panels", [])
             
-            fixtures_found = 0
-            for panel in panels:
-                panel_title = panel.get("title", "")
-                panel_type = panel.get("panelType", "")
-                contents = panel.get("contents", [])
+                fixtures_found = 0
+                for panel in panels:
+                    panel_title = panel.get("title", "")
+                    panel_type = panel.get("panelType", "")
+                    contents = panel.get("contents", [])
                 
-                # Skip nav menus and date selectors
-                if panel_type in ("nav-menu-sticky", "date-selector"):
-                    continue
+                    # Skip nav menus and date selectors
+                    if panel_type in ("nav-menu-sticky", "date-selector"):
+                        continue
                 
-                # Panel title is usually the sport name (Cricket, Basketball, etc.)
-                sport_from_panel = panel_title
+                    # Panel title is usually the sport name (Cricket, Basketball, etc.)
+                    sport_from_panel = panel_title
                 
-                logger.debug(f"  Processing panel: {panel_title} ({len(contents)} items)")
+                    logger.debug(f"  Processing panel: {panel_title} ({len(contents)} items)")
                 
-                for content in contents:
-                    # Only process asset content types
-                    content_type = content.get("contentType")
-                    if content_type != "video":
-                        # Could be "video" or sometimes just in data
-                        data_content_type = content.get("data", {}).get("contentType")
-                        if data_content_type != "asset":
-                            continue
+                    for content in contents:
+                        # Only process asset content types
+                        content_type = content.get("contentType")
+                        if content_type != "video":
+                            # Could be "video" or sometimes just in data
+                            data_content_type = content.get("data", {}).get("contentType")
+                            if data_content_type != "asset":
+                                continue
                     
-                    normalized = normalize_kayo_event(content, sport_from_panel)
-                    if normalized:
-                        all_events.append(normalized)
-                        fixtures_found += 1
+                        normalized = normalize_kayo_event(content, sport_from_panel, keep_raw)
+                        if normalized:
+                            all_events.append(normalized)
+                            fixtures_found += 1
             
-            logger.info(f"  Found {fixtures_found} fixtures for {day.date().isoformat()}")
+                logger.info(f"  Found {fixtures_found} fixtures for {day.date().isoformat()}")
                     
-        except KayoForbidden as e:
-            # If Kayo blocks us for one day, it will almost always block the whole range.
-            msg = (
-                f"Error fetching fixtures for {day.date().isoformat()}: {e} "
-                f"(status={getattr(e, 'status_code', None)})"
-            )
-            logger.error(msg)
-            if getattr(e, "body_snippet", None):
-                logger.debug("Kayo 403 body (first 300 chars): %s", e.body_snippet)
-            logger.error("Stopping Kayo scrape for this run to avoid 403 spam.")
-            break
-        except Exception as e:
-            logger.error(f"Error fetching fixtures for {day.date().isoformat()}: {e}")
-            continue
+            except KayoForbidden as e:
+                # If Kayo blocks us for one day, it will almost always block the whole range.
+                msg = (
+                    f"Error fetching fixtures for {day.date().isoformat()}: {e} "
+                    f"(status={getattr(e, 'status_code', None)})"
+                )
+                logger.error(msg)
+                if getattr(e, "body_snippet", None):
+                    logger.debug("Kayo 403 body (first 300 chars): %s", e.body_snippet)
+                logger.error("Stopping Kayo scrape for this run to avoid 403 spam.")
+                break
+            except Exception as e:
+                logger.error(f"Error fetching fixtures for {day.date().isoformat()}: {e}")
+                continue
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
     
     logger.info(f"Total normalized events: {len(all_events)}")
     return all_events
 
 
+def _dump_line(obj: Any) -> bytes:
+    """Serialize obj as one compact JSON line (UTF-8, newline-terminated)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
 def main() -> int:
     args = get_args()
     
@@ -460,21 +547,20 @@ def main() -> int:
         days=args.days,
         with_live=args.with_live,
         sport=args.sport,
+        keep_raw=args.keep_raw,
     )
     
-    # Build output payload
-    payload = {
+    # Write output as JSONL: a header line, then one compact event per line,
+    # so ingest_kayo.py can stream it without a JSON array parser
+    header = {
         "source": "kayo",
         "generated_utc": datetime.now(timezone.utc).isoformat(),
-        "events": events,
     }
-    
-    # Write output
     args.out.parent.mkdir(parents=True, exist_ok=True)
-    args.out.write_text(
-        json.dumps(payload, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    with args.out.open("wb") as f:
+        f.write(_dump_line(header))
+        for ev in events:
+            f.write(_dump_line(ev))
     
     logger.info(f"Wrote {len(events)} Kayo events to {args.out}")
     return 0
@@ -8,12 +8,15 @@ into distinct logical services based on URL host and content metadata.
 NOW INCLUDES: Amazon channel enrichment via amazon_channels table
 """
 
+import re
 import sqlite3
 import json
-import re
 import sys
 import os
-from typing import Optional, Dict, Any
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Optional, Dict
+from functools import lru_cache
 from urllib.parse import urlparse
 
 # Import canonical service data from the core catalog.
@@ -33,28 +36,39 @@ except ImportError:
     _CATALOG_AVAILABLE = False
 
 # Logical service definitions
+# Keys are domain suffixes: a host matches its own entry or that of any parent
+# domain (www.peacocktv.com and m.peacocktv.com both hit peacocktv.com)
 LOGICAL_SERVICE_MAP = {
     # Web-based services by domain
     'peacocktv.com': 'peacock_web',
-    'www.peacocktv.com': 'peacock_web',
-    'play.hbomax.com': 'max',
-    'www.max.com': 'max',
+    'hbomax.com': 'max',
+    'max.com': 'max',
     'f1tv.formula1.com': 'f1tv',
     'tv.apple.com': 'apple_tv',  # Special - needs league lookup
     'kayosports.com.au': 'kayo_web',
-    'www.kayosports.com.au': 'kayo_web',
-    'watch.fanatiz.com': 'fanatiz_web',
-    'www.fanatiz.com': 'fanatiz_web',
+    'fanatiz.com': 'fanatiz_web',
     'gothamsports.com': 'gotham',
-    'www.gothamsports.com': 'gotham',
     'beinsports.com': 'bein',
-    'www.beinsports.com': 'bein',
     'watch.nesn.com': 'nesn_web',
-    'www.watch.nesn.com': 'nesn_web',
     'tubitv.com': 'tubi',
-    'www.tubitv.com': 'tubi',
 }
 
+# Deepest key in LOGICAL_SERVICE_MAP, in labels; bounds the suffix walk
+_MAX_HOST_LABELS = max(k.count('.') + 1 for k in LOGICAL_SERVICE_MAP)
+
+
+@lru_cache(maxsize=1024)
+def _lookup_host(host: str) -> Optional[str]:
+    """Return the service for host or its nearest listed parent domain"""
+    # host is a raw netloc: drop any userinfo and port before matching
+    labels = host.rpartition('@')[2].partition(':')[0].split('.')
+    for i in range(max(0, len(labels) - _MAX_HOST_LABELS), len(labels) - 1):
+        service = LOGICAL_SERVICE_MAP.get('.'.join(labels[i:]))
+        if service:
+            return service
+    return None
+
+
 # Display names for logical services.
 # When _CATALOG_AVAILABLE is True these are already imported from service_catalog;
 # this inline dict is only used as a last-resort fallback.
@@ -85,10 +99,70 @@ if not _CATALOG_AVAILABLE:
         'aiv_aggregator': 'Amazon - Unknown', 'https': 'Web - Other', 'http': 'Web - Other',
     }
 
+# Providers whose playables are resolved by URL host
+_WEB_PROVIDERS = frozenset(('http', 'https', '', None))
+
+# App providers whose logical service differs from the raw provider name
+_PROVIDER_ALIASES = {
+    'kayo': 'kayo_web',           # Kayo provider: map to kayo_web
+    'mlbatbat': 'mlb',            # MLB At Bat (Apple TV uses mlbatbat:// scheme for MLB.TV)
+    'ncaamml': 'ncaa_march_madness',  # NCAA March Madness Live (ncaamml:// scheme)
+}
+
+# ESPN service names that indicate streaming (ESPN+/Unlimited) rather than linear
+_ESPN_STREAMING_RE = re.compile(r'ESPN\+|Unlimited|Extra|Plus V2')
+
+# Characters valid in a URL scheme, and ones urlparse strips before splitting
+_SCHEME_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-.')
+_URL_UNSAFE_CHARS = frozenset('\t\r\n')
+
+# Amazon GTIs are 'amzn1.dv.gti.' followed by a 36-char lowercase UUID
+_GTI_PREFIX = 'amzn1.dv.gti.'
+_GTI_LEN = len(_GTI_PREFIX) + 36
+_GTI_UUID_CHARS = frozenset('0123456789abcdef-')
+
+
+def _find_gti(deeplink: str, key: str, need_separator: bool) -> Optional[str]:
+    """Return the first well-formed GTI following key + '=' in deeplink.
+
+    With need_separator, key must be preceded by '?' or '&' (a real query
+    parameter rather than the tail of a longer name).
+    """
+    marker = key + '=' + _GTI_PREFIX
+    start = 0
+    while True:
+        i = deeplink.find(marker, start)
+        if i < 0:
+            return None
+        if not need_separator or (i > 0 and deeplink[i - 1] in '?&'):
+            j = i + len(key) + 1
+            gti = deeplink[j:j + _GTI_LEN]
+            if len(gti) == _GTI_LEN and _GTI_UUID_CHARS.issuperset(gti[len(_GTI_PREFIX):]):
+                return gti
+        start = i + 1
 
+
+@lru_cache(maxsize=4096)
 def extract_host_from_url(url: str) -> Optional[str]:
-    """Extract hostname from URL"""
+    """Extract hostname from URL
+    
+    Plain 'scheme://host/...' URLs are sliced directly; anything unusual
+    (no scheme, brackets, whitespace, non-ASCII) goes through urlparse.
+    """
     try:
+        i = url.find('://')
+        if (i > 0 and url.isascii() and url[0].isalpha()
+                and _SCHEME_CHARS.issuperset(url[:i])):
+            start = i + 3
+            end = len(url)
+            for sep in '/?#':
+                j = url.find(sep, start, end)
+                if j >= 0:
+                    end = j
+            host = url[start:end]
+            if '[' not in host and ']' not in host and not _URL_UNSAFE_CHARS.intersection(url):
+                return host.lower()
+        
         parsed = urlparse(url)
         return parsed.netloc.lower()
     except:
@@ -105,22 +179,66 @@ def extract_gti_from_deeplink(deeplink: str) -> Optional[str]:
     if not deeplink:
         return None
     
-    try:
-        # Try broadcast GTI first (for live events)
-        broadcast_match = re.search(r'broadcast=(amzn1\.dv\.gti\.[0-9a-f-]{36})', deeplink)
-        if broadcast_match:
-            return broadcast_match.group(1)
-        
-        # Fall back to main GTI
-        main_match = re.search(r'[?&]gti=(amzn1\.dv\.gti\.[0-9a-f-]{36})', deeplink)
-        if main_match:
-            return main_match.group(1)
-    except Exception:
-        pass
-    
+    # Try broadcast GTI first (for live events), then fall back to main GTI
+    return _find_gti(deeplink, 'broadcast', False) or _find_gti(deeplink, 'gti', True)
+
+
+# League values that are exactly one token, then substring fallbacks checked in
+# the original precedence order (MLS, MLB/baseball, NBA, NHL/hockey)
+_LEAGUE_EXACT = {
+    'MLS': 'MLS', 'MLB': 'MLB', 'BASEBALL': 'MLB',
+    'NBA': 'NBA', 'NHL': 'NHL', 'HOCKEY': 'NHL',
+}
+_LEAGUE_SUBSTR = (
+    ('MLS', 'MLS'), ('MLB', 'MLB'), ('BASEBALL', 'MLB'),
+    ('NBA', 'NBA'), ('NHL', 'NHL'), ('HOCKEY', 'NHL'),
+)
+
+
+# Apple TV service per normalized league; anything else is 'apple_other'
+_APPLE_LEAGUE_SERVICES = {
+    'MLS': 'apple_mls',
+    'MLB': 'apple_mlb',
+    'NBA': 'apple_nba',
+    'NHL': 'apple_nhl',
+    'MOTORSPORTS': 'apple_f1',
+}
+
+
+@lru_cache(maxsize=1024)
+def _league_code(classification_json: str) -> Optional[str]:
+    """Parse and normalize classification_json (raises on malformed data)"""
+    classifications = json.loads(classification_json)
+    for item in classifications:
+        if isinstance(item, dict) and item.get('type') == 'sport':
+            sport = item.get('value', '').upper()
+            if 'MOTORSPORT' in sport:
+                return 'MOTORSPORTS'
+    for item in classifications:
+        if isinstance(item, dict) and item.get('type') == 'league':
+            league = item.get('value', '').upper()
+            # Normalize league names
+            code = _LEAGUE_EXACT.get(league)
+            if code:
+                return code
+            for token, code in _LEAGUE_SUBSTR:
+                if token in league:
+                    return code
+
     return None
 
 
+def _league_from_classification_json(event_id: str, classification_json: Optional[str]) -> Optional[str]:
+    """Normalize an event's classification_json to a league code"""
+    try:
+        if not classification_json:
+            return None
+        return _league_code(classification_json)
+    except Exception as e:
+        print(f"Error getting league for {event_id}: {e}")
+        return None
+
+
 def get_league_from_event(conn: sqlite3.Connection, event_id: str) -> Optional[str]:
     """Get league from event's classification_json"""
     try:
@@ -133,44 +251,75 @@ def get_league_from_event(conn: sqlite3.Connection, event_id: str) -> Optional[s
         
         row = cur.fetchone()
         cur.close()  # CRITICAL FIX: Close cursor after fetching
-        
-        if not row or not row[0]:
-            return None
-        
-        classifications = json.loads(row[0])
-        for item in classifications:
-            if isinstance(item, dict) and item.get('type') == 'sport':
-                sport = item.get('value', '').upper()
-                if 'MOTORSPORT' in sport:
-                    return 'MOTORSPORTS'
-        for item in classifications:
-            if isinstance(item, dict) and item.get('type') == 'league':
-                league = item.get('value', '').upper()
-                # Normalize league names
-                if 'MLS' in league:
-                    return 'MLS'
-                elif 'MLB' in league or 'BASEBALL' in league:
-                    return 'MLB'
-                elif 'NBA' in league:
-                    return 'NBA'
-                elif 'NHL' in league or 'HOCKEY' in league:
-                    return 'NHL'
-
-        return None
     except Exception as e:
         print(f"Error getting league for {event_id}: {e}")
         return None
+    
+    if not row:
+        return None
+    return _league_from_classification_json(event_id, row[0])
+
+
+def load_amazon_service_map(conn: sqlite3.Connection) -> Dict[str, str]:
+    """Load every live Amazon GTI -> logical service mapping in one query
+    
+    Args:
+        conn: Database connection
+    
+    Returns:
+        Dict mapping GTI -> logical service code; empty if the scraper tables
+        are not available
+    """
+    # A missing amazon_channels/amazon_services table (no scraper) surfaces as an
+    # OperationalError below, so no sqlite_master probe is needed
+    try:
+        rows = conn.execute("""
+            SELECT ac.gti, s.logical_service
+            FROM amazon_channels ac
+            JOIN amazon_services s ON ac.channel_id = s.amazon_channel_id
+            WHERE ac.is_stale = 0
+        """).fetchall()
+    except Exception:
+        # Silently fail if amazon_channels not available
+        # This allows graceful degradation for deployments without scraper
+        return {}
+    
+    # Keep the first mapping per GTI, matching what a per-GTI fetchone() returned.
+    # Many GTIs share a handful of service codes: intern so they share one string
+    gti_to_service: Dict[str, str] = {}
+    for gti, logical_service in rows:
+        if gti not in gti_to_service:
+            gti_to_service[gti] = sys.intern(logical_service) if logical_service else logical_service
+    return gti_to_service
+
+
+def _query_amazon_service(conn: sqlite3.Connection, gti: str) -> Optional[str]:
+    """Look up a single GTI in amazon_channels (for one-off callers)"""
+    try:
+        row = conn.execute("""
+            SELECT s.logical_service
+            FROM amazon_channels ac
+            JOIN amazon_services s ON ac.channel_id = s.amazon_channel_id
+            WHERE ac.gti = ? AND ac.is_stale = 0
+        """, (gti,)).fetchone()
+    except Exception:
+        # Silently fail if amazon_channels not available
+        return None
+    
+    if row and row[0]:
+        return row[0]
+    return None
 
 
 def get_amazon_service_for_playable(
-    conn: sqlite3.Connection,
+    gti_to_service: Dict[str, str],
     deeplink_play: Optional[str],
     deeplink_open: Optional[str]
 ) -> Optional[str]:
-    """Get Amazon service from amazon_channels table
+    """Get Amazon service from a preloaded amazon_channels mapping
     
     Args:
-        conn: Database connection
+        gti_to_service: Mapping from load_amazon_service_map()
         deeplink_play: Play deeplink URL
         deeplink_open: Open deeplink URL
     
@@ -183,36 +332,7 @@ def get_amazon_service_for_playable(
     if not gti:
         return None
     
-    try:
-        # Check if amazon_channels table exists
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='amazon_channels'
-        """)
-        if not cur.fetchone():
-            cur.close()
-            return None
-        
-        # Query for service mapping
-        cur.execute("""
-            SELECT s.logical_service
-            FROM amazon_channels ac
-            JOIN amazon_services s ON ac.channel_id = s.amazon_channel_id
-            WHERE ac.gti = ? AND ac.is_stale = 0
-        """, (gti,))
-        
-        row = cur.fetchone()
-        cur.close()
-        
-        if row and row[0]:
-            return row[0]
-    except Exception as e:
-        # Silently fail if amazon_channels not available
-        # This allows graceful degradation for deployments without scraper
-        pass
-    
-    return None
+    return gti_to_service.get(gti) or None
 
 
 def get_logical_service_for_playable(
@@ -222,7 +342,9 @@ def get_logical_service_for_playable(
     playable_url: Optional[str],
     event_id: Optional[str] = None,
     conn: Optional[sqlite3.Connection] = None,
-    service_name: Optional[str] = None
+    service_name: Optional[str] = None,
+    amazon_services: Optional[Dict[str, str]] = None,
+    event_leagues: Optional[Dict[str, Optional[str]]] = None
 ) -> str:
     """
     Determine the logical service code for a playable.
@@ -235,16 +357,26 @@ def get_logical_service_for_playable(
         event_id: Event ID (needed for Apple TV league lookup)
         conn: Database connection (needed for Apple TV league lookup and Amazon enrichment)
         service_name: Service name from playables table (used for ESPN differentiation)
+        amazon_services: Preloaded GTI mapping from load_amazon_service_map()
+            (skips the per-playable amazon_channels query when given)
+        event_leagues: Preloaded event_id -> league mapping (skips the
+            per-event classification_json query for Apple TV when given)
     
     Returns:
         Logical service code (e.g., 'espn_linear', 'espn_plus', 'aiv_nba_league_pass', etc.)
     """
+    # App providers (the common case) map to themselves or a fixed alias
+    if provider not in _WEB_PROVIDERS and provider != 'sportscenter' and provider != 'aiv':
+        # provider comes from sqlite as a fresh string per row; intern it so
+        # counts and priority lookups hash one shared key
+        return _PROVIDER_ALIASES.get(provider) or sys.intern(provider)
+    
     # ESPN: differentiate linear TV channels from streaming services
     if provider == 'sportscenter':
         if service_name:
             # Streaming services: ESPN+, ESPN Unlimited, and digital overflow content
             # ACC Extra, SEC Plus are digital-only content requiring ESPN+ or ESPN Unlimited
-            if any(x in service_name for x in ['ESPN+', 'Unlimited', 'Extra', 'Plus V2']):
+            if _ESPN_STREAMING_RE.search(service_name):
                 return 'espn_plus'
             # Linear channels: ESPN, ESPN2, ESPN Deportes, ESPNU, ESPNews, ACC Network, SEC Network
             else:
@@ -254,9 +386,14 @@ def get_logical_service_for_playable(
     
     # Amazon: enrich with channel data (NEW)
     if provider == 'aiv':
-        if conn:
-            # Try to get specific Amazon service from scraper data
-            amazon_service = get_amazon_service_for_playable(conn, deeplink_play, deeplink_open)
+        # Try to get specific Amazon service from scraper data
+        if amazon_services is not None:
+            amazon_service = get_amazon_service_for_playable(amazon_services, deeplink_play, deeplink_open)
+            if amazon_service:
+                return amazon_service
+        elif conn:
+            gti = extract_gti_from_deeplink(deeplink_play or deeplink_open or '')
+            amazon_service = _query_amazon_service(conn, gti) if gti else None
             if amazon_service:
                 return amazon_service
         
@@ -264,38 +401,6 @@ def get_logical_service_for_playable(
         # This maintains current behavior for unmapped/404 content
         return 'aiv_aggregator'
     
-    # Kayo provider: map to kayo_web
-    if provider == 'kayo':
-        return 'kayo_web'
-    
-    # Victory+ provider: map to victory
-    if provider == 'victory':
-        return 'victory'
-    
-    # Gotham Sports provider: map to gotham
-    if provider == 'gotham':
-        return 'gotham'
-    
-    # beIN Sports provider: map to bein
-    if provider == 'bein':
-        return 'bein'
-    
-    # NESN provider: single service with multiple playables
-    if provider == 'nesn':
-        return 'nesn'
-    
-    # MLB At Bat provider (Apple TV uses mlbatbat:// scheme for MLB.TV)
-    if provider == 'mlbatbat':
-        return 'mlb'
-
-    # NCAA March Madness Live provider (Apple TV uses ncaamml:// scheme)
-    if provider == 'ncaamml':
-        return 'ncaa_march_madness'
-    
-    # Non-web providers: use provider as-is
-    if provider not in ('http', 'https', None, ''):
-        return provider
-    
     # Web providers: analyze URL
     url = deeplink_play or deeplink_open or playable_url
     if not url:
@@ -306,25 +411,17 @@ def get_logical_service_for_playable(
         return 'https'
     
     # Check if it's a known service
-    if host in LOGICAL_SERVICE_MAP:
-        service = LOGICAL_SERVICE_MAP[host]
+    service = _lookup_host(host)
+    if service:
         
         # Special handling for Apple TV - need league
         if service == 'apple_tv':
-            if event_id and conn:
-                league = get_league_from_event(conn, event_id)
-                if league == 'MLS':
-                    return 'apple_mls'
-                elif league == 'MLB':
-                    return 'apple_mlb'
-                elif league == 'NBA':
-                    return 'apple_nba'
-                elif league == 'NHL':
-                    return 'apple_nhl'
-                elif league == 'MOTORSPORTS':
-                    return 'apple_f1'
+            if event_id and (event_leagues is not None or conn):
+                if event_leagues is not None:
+                    league = event_leagues.get(event_id)
                 else:
-                    return 'apple_other'
+                    league = get_league_from_event(conn, event_id)
+                return _APPLE_LEAGUE_SERVICES.get(league, 'apple_other')
             else:
                 # Can't determine league, fallback
                 return 'apple_other'
@@ -335,111 +432,144 @@ def get_logical_service_for_playable(
     return 'https'
 
 
-def get_service_display_name(service_code: str) -> str:
-    """Get human-readable display name for a service code"""
-    return SERVICE_DISPLAY_NAMES.get(service_code, service_code.upper())
-
-
 def get_all_logical_services_with_counts(conn: sqlite3.Connection) -> Dict[str, int]:
     """
     Query all playables and return counts by logical service.
     
+    Playables that already carry a stored logical_service (the common case,
+    set at import time) are counted with a GROUP BY in SQL. Only the rest are
+    resolved in Python, once per distinct combination of mapper inputs.
+    
     Returns:
         Dict mapping service_code -> count
     """
     cur = conn.cursor()
     
-    # Get all future playables with event info
+    # One query for all Amazon GTI mappings instead of one per aiv playable
+    amazon_services = load_amazon_service_map(conn)
+    
+    # Stored logical_service: count directly in SQLite
     cur.execute("""
-        SELECT 
-            p.provider,
-            p.deeplink_play,
-            p.deeplink_open,
-            p.playable_url,
-            p.event_id,
-            p.service_name,
-            p.logical_service
+        SELECT p.logical_service, COUNT(*)
         FROM playables p
         JOIN events e ON p.event_id = e.id
         WHERE e.end_utc > datetime('now')
+          AND p.logical_service IS NOT NULL AND p.logical_service != ''
+        GROUP BY p.logical_service
+    """)
+    service_counts: Dict[str, int] = defaultdict(int, cur.fetchall())
+    
+    # No stored logical_service: reduce each row to the inputs the mapper
+    # actually reads for its provider, so GROUP BY collapses rows that must
+    # resolve the same way (a URL only matters for Amazon and web providers,
+    # service_name only for ESPN, event_id only for Apple TV web links - any
+    # link whose host is tv.apple.com contains it once urlparse's tab/CR/LF
+    # stripping is applied)
+    cur.execute("""
+        SELECT 
+            provider,
+            link,
+            CASE
+                WHEN (provider IN ('http', 'https', '') OR provider IS NULL)
+                 AND instr(lower(replace(replace(replace(link, char(9), ''), char(10), ''), char(13), '')),
+                           'tv.apple.com') > 0
+                    THEN event_id
+            END,
+            service_name,
+            COUNT(*),
+            classification_json
+        FROM (
+            SELECT 
+                p.provider,
+                CASE
+                    WHEN p.provider = 'aiv'
+                        THEN COALESCE(NULLIF(p.deeplink_play, ''), NULLIF(p.deeplink_open, ''))
+                    WHEN p.provider IN ('http', 'https', '') OR p.provider IS NULL
+                        THEN COALESCE(NULLIF(p.deeplink_play, ''), NULLIF(p.deeplink_open, ''),
+                                      NULLIF(p.playable_url, ''))
+                END AS link,
+                p.event_id,
+                CASE WHEN p.provider = 'sportscenter' THEN p.service_name END AS service_name,
+                e.classification_json
+            FROM playables p
+            JOIN events e ON p.event_id = e.id
+            WHERE e.end_utc > datetime('now')
+              AND (p.logical_service IS NULL OR p.logical_service = '')
+        )
+        GROUP BY 1, 2, 3, 4
     """)
     
-    # CRITICAL FIX: Fetch ALL rows first before processing
-    # This prevents SQLite lock when get_logical_service_for_playable 
-    # calls get_league_from_event or get_amazon_service_for_playable which create another cursor
-    all_rows = cur.fetchall()
-    
-    service_counts = {}
-    event_services = {}  # Track which services each event has
-    
-    for row in all_rows:  # Changed from cur.fetchall() to all_rows
-        provider = row[0]
-        deeplink_play = row[1]
-        deeplink_open = row[2]
-        playable_url = row[3]
-        event_id = row[4]
-        service_name = row[5]
-        logical_service = row[6]  # Use pre-calculated logical_service if available
-        
-        # Use stored logical_service if available, otherwise calculate it
-        if logical_service:
-            service_code = logical_service
-        else:
-            service_code = get_logical_service_for_playable(
-                provider=provider,
-                deeplink_play=deeplink_play,
-                deeplink_open=deeplink_open,
-                playable_url=playable_url,
-                event_id=event_id,
-                conn=conn,
-                service_name=service_name
-            )
-        
-        service_counts[service_code] = service_counts.get(service_code, 0) + 1
-        
-        # Track which services each event has (for Amazon Exclusives detection)
-        if event_id not in event_services:
-            event_services[event_id] = set()
-        event_services[event_id].add(service_code)
-    
-    return service_counts
+    # Amazon and league lookups come from the preloaded dicts (conn is not
+    # passed down), so nothing else touches the database while this cursor is
+    # open and the grouped rows can be streamed instead of fetched all at once.
+    # Apple TV groups carry their event's classification_json (one event per
+    # group): parse it the first time each event shows up.
+    cur.arraysize = 1000
+    event_leagues: Dict[str, Optional[str]] = {}
+    for provider, link, event_id, service_name, count, classification_json in cur:
+        if event_id and event_id not in event_leagues:
+            event_leagues[event_id] = _league_from_classification_json(event_id, classification_json)
+        service_code = get_logical_service_for_playable(
+            provider=provider,
+            deeplink_play=link,
+            deeplink_open=None,
+            playable_url=None,
+            event_id=event_id,
+            service_name=service_name,
+            amazon_services=amazon_services,
+            event_leagues=event_leagues
+        )
+        service_counts[service_code] += count
+    
+    return dict(service_counts)
 
 
 # Fallback implementations used only when core.service_catalog is unavailable.
 if not _CATALOG_AVAILABLE:
+    @lru_cache(maxsize=256)
     def get_service_display_name(service_code: str) -> str:
+        """Get human-readable display name for a service code"""
         return SERVICE_DISPLAY_NAMES.get(service_code, service_code.upper())
 
+    _PRIORITY_MAP = MappingProxyType({
+        'espn_linear': 0, 'sportsonespn': 1, 'espn_plus': 1, 'sportscenter': 1,
+        'peacock': 2, 'peacock_web': 3, 'pplus': 4, 'max': 5,
+        'aiv_free': 1, 'aiv_prime': 4, 'aiv_peacock': 5, 'aiv_max': 5,
+        'cbssportsapp': 6, 'cbstve': 7, 'nbcsportstve': 8,
+        'foxone': 9, 'aiv_fox': 9, 'aiv_fox_one': 9, 'fsapp': 10,
+        'apple_mls': 11, 'apple_mlb': 12, 'apple_nba': 13, 'apple_nhl': 14,
+        'apple_f1': 15, 'apple_other': 16, 'dazn': 16, 'aiv_dazn': 16,
+        'open.dazn.com': 17, 'f1tv': 18, 'kayo_web': 19, 'bein': 19,
+        'victory': 19, 'nesn': 19, 'nesn_web': 19, 'fanatiz_web': 20,
+        'gotham': 20, 'marquee': 20, 'vixapp': 21,
+        'aiv_vix_premium': 21, 'aiv_vix': 21,
+        'aiv_tennis_channel': 22, 'aiv_fanduel': 22, 'nflctv': 22,
+        'watchtru': 23, 'ncaa_march_madness': 24, 'watchtnt': 24, 'watchtbs': 25,
+        'nba': 26, 'aiv_nba_league_pass': 26, 'gametime': 26, 'mlb': 26, 'nhl': 26,
+        'aiv': 27, 'aiv_aggregator': 27, 'https': 30, 'http': 31,
+    })
+
     def get_logical_service_priority(service_code: str) -> int:
-        _FALLBACK = {
-            'espn_linear': 0, 'sportsonespn': 1, 'espn_plus': 1, 'sportscenter': 1,
-            'peacock': 2, 'peacock_web': 3, 'pplus': 4, 'max': 5,
-            'aiv_free': 1, 'aiv_prime': 4, 'aiv_peacock': 5, 'aiv_max': 5,
-            'cbssportsapp': 6, 'cbstve': 7, 'nbcsportstve': 8,
-            'foxone': 9, 'aiv_fox': 9, 'aiv_fox_one': 9, 'fsapp': 10,
-            'apple_mls': 11, 'apple_mlb': 12, 'apple_nba': 13, 'apple_nhl': 14,
-            'apple_f1': 15, 'apple_other': 16, 'dazn': 16, 'aiv_dazn': 16,
-            'open.dazn.com': 17, 'f1tv': 18, 'kayo_web': 19, 'bein': 19,
-            'victory': 19, 'nesn': 19, 'nesn_web': 19, 'fanatiz_web': 20,
-            'gotham': 20, 'marquee': 20, 'vixapp': 21,
-            'aiv_vix_premium': 21, 'aiv_vix': 21,
-            'aiv_tennis_channel': 22, 'aiv_fanduel': 22, 'nflctv': 22,
-            'watchtru': 23, 'ncaa_march_madness': 24, 'watchtnt': 24, 'watchtbs': 25,
-            'nba': 26, 'aiv_nba_league_pass': 26, 'gametime': 26, 'mlb': 26, 'nhl': 26,
-            'aiv': 27, 'aiv_aggregator': 27, 'https': 30, 'http': 31,
-        }
-        return _FALLBACK.get(service_code, 25)
+        return _PRIORITY_MAP.get(service_code, 25)
 
 
 if __name__ == '__main__':
     """Test the logical service mapper"""
-    print("="*80)
-    print("LOGICAL SERVICE MAPPER - TEST (with Amazon enrichment)")
-    print("="*80)
-    print()
+    # Collect the report and write it once at the end
+    out = [
+        "="*80,
+        "LOGICAL SERVICE MAPPER - TEST (with Amazon enrichment)",
+        "="*80,
+        "",
+    ]
     
     DB_PATH = "/app/data/fruit_events.db"
     conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-65536;")  # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456;")
     
     # Check if Amazon tables exist
     cur = conn.cursor()
@@ -451,52 +581,52 @@ if __name__ == '__main__':
     cur.close()
     
     if has_amazon:
-        print("✓ Amazon channel data available")
+        out.append("✓ Amazon channel data available")
     else:
-        print("⚠ Amazon channel data NOT available (will use aggregator fallback)")
-    print()
+        out.append("⚠ Amazon channel data NOT available (will use aggregator fallback)")
+    out.append("")
     
-    print("Analyzing all playables and mapping to logical services...")
-    print()
+    out.append("Analyzing all playables and mapping to logical services...")
+    out.append("")
     
     service_counts = get_all_logical_services_with_counts(conn)
     
-    print(f"Found {len(service_counts)} distinct logical services:")
-    print("-"*80)
+    out.append(f"Found {len(service_counts)} distinct logical services:")
+    out.append("-"*80)
     
     # Sort by count descending
     for service_code, count in sorted(service_counts.items(), key=lambda x: -x[1]):
         display_name = get_service_display_name(service_code)
         priority = get_logical_service_priority(service_code)
-        print(f"  {service_code:25s} | {display_name:30s} | {count:4d} playables | priority: {priority:2d}")
+        out.append(f"  {service_code:25s} | {display_name:30s} | {count:4d} playables | priority: {priority:2d}")
     
-    print()
-    print("="*80)
+    out.append("")
+    out.append("="*80)
     
     # Show breakdown of Amazon services specifically
     amazon_services = {k: v for k, v in service_counts.items() 
                       if k.startswith('aiv')}
     
     if amazon_services:
-        print("AMAZON SERVICES BREAKDOWN:")
-        print("-"*80)
+        out.append("AMAZON SERVICES BREAKDOWN:")
+        out.append("-"*80)
         total_amazon = sum(amazon_services.values())
         for service_code, count in sorted(amazon_services.items(), key=lambda x: -x[1]):
             display_name = get_service_display_name(service_code)
             priority = get_logical_service_priority(service_code)
             pct = 100 * count / total_amazon if total_amazon > 0 else 0
-            print(f"  {display_name:30s} {count:4d} ({pct:5.1f}%) | priority: {priority:2d}")
-        print(f"\n  Total Amazon Playables: {total_amazon}")
+            out.append(f"  {display_name:30s} {count:4d} ({pct:5.1f}%) | priority: {priority:2d}")
+        out.append(f"\n  Total Amazon Playables: {total_amazon}")
         
         # Calculate how many are properly mapped vs aggregator
         mapped = sum(v for k, v in amazon_services.items() if k not in ('aiv', 'aiv_aggregator'))
         aggregator = sum(v for k, v in amazon_services.items() if k in ('aiv', 'aiv_aggregator'))
         if total_amazon > 0:
-            print(f"  Mapped to specific services: {mapped} ({100*mapped/total_amazon:.1f}%)")
-            print(f"  Aggregator/unknown: {aggregator} ({100*aggregator/total_amazon:.1f}%)")
+            out.append(f"  Mapped to specific services: {mapped} ({100*mapped/total_amazon:.1f}%)")
+            out.append(f"  Aggregator/unknown: {aggregator} ({100*aggregator/total_amazon:.1f}%)")
     
-    print()
-    print("="*80)
+    out.append("")
+    out.append("="*80)
     
     # Show breakdown of web services specifically
     web_services = {k: v for k, v in service_counts.items()
@@ -504,13 +634,14 @@ if __name__ == '__main__':
                            'apple_nba', 'apple_nhl', 'apple_f1', 'apple_other', 'https', 'http')}
     
     if web_services:
-        print("WEB SERVICES BREAKDOWN:")
-        print("-"*80)
+        out.append("WEB SERVICES BREAKDOWN:")
+        out.append("-"*80)
         total_web = sum(web_services.values())
         for service_code, count in sorted(web_services.items(), key=lambda x: -x[1]):
             display_name = get_service_display_name(service_code)
             pct = 100 * count / total_web if total_web > 0 else 0
-            print(f"  {display_name:25s} {count:4d} ({pct:5.1f}%)")
-        print(f"\n  Total Web Playables: {total_web}")
+            out.append(f"  {display_name:25s} {count:4d} ({pct:5.1f}%)")
+        out.append(f"\n  Total Web Playables: {total_web}")
     
     conn.close()
+    sys.stdout.write("\n".join(out) + "\n")
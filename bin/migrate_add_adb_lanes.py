@@ -13,7 +13,9 @@ import argparse
 import logging
 import sqlite3
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set
+
+from db.connection import tune
 
 DEFAULT_DB_PATH = Path(__file__).resolve().parents[1] / "data" / "fruit_events.db"
 
@@ -38,6 +40,7 @@ def ensure_adb_lanes_table(conn: sqlite3.Connection, log: logging.Logger) -> boo
     )
     if cur.fetchone():
         log.debug("Table adb_lanes already exists; nothing to create.")
+        ensure_adb_lanes_lookup_index(conn, log)
         return False
 
     log.info("Creating table adb_lanes ...")
@@ -58,38 +61,79 @@ def ensure_adb_lanes_table(conn: sqlite3.Connection, log: logging.Logger) -> boo
     cur.execute(
         "CREATE INDEX idx_adb_lanes_channel_time ON adb_lanes(channel_id, start_utc);"
     )
-    cur.execute(
-        "CREATE INDEX idx_adb_lanes_provider_lane ON adb_lanes(provider_code, lane_number, start_utc);"
-    )
     conn.commit()
+    ensure_adb_lanes_lookup_index(conn, log)
     log.info("Table adb_lanes created with supporting indexes.")
     return True
 
 
-def ensure_http_deeplink_column(conn: sqlite3.Connection, log: logging.Logger) -> bool:
+def ensure_adb_lanes_lookup_index(conn: sqlite3.Connection, log: logging.Logger) -> None:
+    """
+    Covering index for the per-lane "what is on now" lookup.
+
+    The ADB endpoints filter on (provider_code, lane_number), range-check
+    start_utc/stop_utc and read event_id/channel_id; with every column in the
+    index the lookup never touches the table. It supersedes the older
+    (provider_code, lane_number, start_utc) index, which is dropped.
+    """
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_adb_lanes_provider_lane_cover "
+        "ON adb_lanes(provider_code, lane_number, start_utc, stop_utc, event_id, channel_id);"
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_adb_lanes_provider_lane;")
+    conn.commit()
+    log.debug("Index idx_adb_lanes_provider_lane_cover ensured.")
+
+
+def ensure_http_deeplink_column(conn: sqlite3.Connection, columns: Set[str], log: logging.Logger) -> bool:
     """
     Add http_deeplink_url column to playables table for Android/Fire TV compatibility.
     
+    columns is the playables column set read by migrate(); it is updated in
+    place when the column is added.
+
     Returns True if column was added, False if it already existed.
     """
     cur = conn.cursor()
     
     # Check if column already exists
-    cur.execute("PRAGMA table_info(playables)")
-    columns = [row[1] for row in cur.fetchall()]
-    
     if "http_deeplink_url" in columns:
         log.debug("Column playables.http_deeplink_url already exists; nothing to create.")
+        ensure_needs_http_index(conn, columns, log)
         return False
     
     log.info("Adding http_deeplink_url column to playables table...")
     cur.execute("ALTER TABLE playables ADD COLUMN http_deeplink_url TEXT")
     conn.commit()
+    columns.add("http_deeplink_url")
     log.info("Column playables.http_deeplink_url added.")
+    ensure_needs_http_index(conn, columns, log)
     return True
 
 
-def populate_http_deeplinks(conn: sqlite3.Connection, log: logging.Logger) -> None:
+def ensure_needs_http_index(conn: sqlite3.Connection, columns: Set[str], log: logging.Logger) -> None:
+    """
+    Partial index over playables still waiting for an HTTP deeplink.
+
+    Its WHERE clause matches the prefill query in populate_http_deeplinks
+    term for term, so each run visits only the rows that need work instead
+    of scanning the whole table.
+    """
+    if not {"deeplink_play", "event_id", "playable_id"}.issubset(columns):
+        return
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_playables_needs_http
+        ON playables(event_id, playable_id)
+        WHERE (http_deeplink_url IS NULL OR http_deeplink_url = '')
+          AND (deeplink_play IS NOT NULL AND deeplink_play != '')
+        """
+    )
+    conn.commit()
+    log.debug("Index idx_playables_needs_http ensured.")
+
+
+def populate_http_deeplinks(conn: sqlite3.Connection, cols: Set[str], log: logging.Logger) -> None:
     """
     OPTIONAL PRE-POPULATION:
       Fill playables.http_deeplink_url for rows that have a deeplink but no HTTP version yet.
@@ -103,10 +147,6 @@ def populate_http_deeplinks(conn: sqlite3.Connection, log: logging.Logger) -> No
     """
     cur = conn.cursor()
 
-    # Inspect schema
-    cur.execute("PRAGMA table_info(playables)")
-    cols = [r[1] for r in cur.fetchall()]
-
     if "http_deeplink_url" not in cols:
         log.info("Column playables.http_deeplink_url not found; skipping prefill.")
         return
@@ -121,6 +161,19 @@ def populate_http_deeplinks(conn: sqlite3.Connection, log: logging.Logger) -> No
         log.info("playables missing event_id/playable_id; skipping prefill.")
         return
 
+    primary_col = "deeplink_play" if "deeplink_play" in cols else src_cols[0]
+    needs_http = f"""
+        (http_deeplink_url IS NULL OR http_deeplink_url = '')
+          AND ({primary_col} IS NOT NULL AND {primary_col} != '')
+    """
+
+    # Re-runs usually have nothing left to fill: one probe against
+    # idx_playables_needs_http settles that before the converter import
+    # and the full SELECT
+    if cur.execute(f"SELECT 1 FROM playables WHERE {needs_http} LIMIT 1").fetchone() is None:
+        log.info("No playables need HTTP deeplink generation.")
+        return
+
     # Import converter (supports new signature; fall back to old if needed)
     try:
         from deeplink_converter import generate_http_deeplink
@@ -128,53 +181,72 @@ def populate_http_deeplinks(conn: sqlite3.Connection, log: logging.Logger) -> No
         log.info(f"deeplink_converter not available; skipping prefill (runtime conversion will be used). ({e})")
         return
 
-    primary_col = "deeplink_play" if "deeplink_play" in cols else src_cols[0]
     log.info(f"Prefilling http_deeplink_url from {primary_col} (fallbacks: {', '.join(src_cols)})")
 
+    # First non-empty source in priority order; coalesce() needs 2+ arguments
+    candidates = [f"NULLIF({c}, '')" for c in src_cols]
+    source_expr = candidates[0] if len(candidates) == 1 else f"COALESCE({', '.join(candidates)})"
+
     # Pull rows needing HTTP; limit to keep migration snappy
     query = f"""
         SELECT event_id, playable_id, provider,
-               {', '.join(src_cols)}
+               {source_expr}
         FROM playables
-        WHERE (http_deeplink_url IS NULL OR http_deeplink_url = '')
-          AND ({primary_col} IS NOT NULL AND {primary_col} != '')
+        WHERE {needs_http}
         LIMIT 20000
     """
     cur.execute(query)
-    rows = cur.fetchall()
 
-    if not rows:
+    # Stream the candidates in chunks: only the (much smaller) update tuples
+    # are kept, never the full rows with all their URL columns
+    updates = []
+    scanned = 0
+    while True:
+        rows = cur.fetchmany(1000)
+        if not rows:
+            break
+        if not scanned:
+            log.info("Generating HTTP deeplinks...")
+        scanned += len(rows)
+
+        for row in rows:
+            # COALESCE already picked the first non-empty candidate in order
+            event_id, playable_id, provider, deeplink = row
+            if not deeplink:
+                continue
+
+            try:
+                http_url = generate_http_deeplink(deeplink, provider=provider, playable_id=playable_id)
+            except TypeError:
+                # Back-compat: generate_http_deeplink(url, provider)
+                http_url = generate_http_deeplink(deeplink, provider)
+
+            if not http_url:
+                continue
+
+            updates.append((http_url, event_id, playable_id))
+
+    if not scanned:
         log.info("No playables need HTTP deeplink generation.")
         return
 
-    log.info(f"Generating HTTP deeplinks for {len(rows)} playables...")
-    updated = 0
-
-    for row in rows:
-        event_id, playable_id, provider, *candidates = row
-
-        # pick first non-empty candidate in our priority order
-        deeplink = next((d for d in candidates if d), None)
-        if not deeplink:
-            continue
+    log.info(f"Converted {len(updates)} of {scanned} playables.")
 
+    # One prepared statement for the whole batch, in one explicit write
+    # transaction taken only after conversion is done
+    updated = 0
+    if updates:
+        cur.execute("BEGIN IMMEDIATE")
         try:
-            http_url = generate_http_deeplink(deeplink, provider=provider, playable_id=playable_id)
-        except TypeError:
-            # Back-compat: generate_http_deeplink(url, provider)
-            http_url = generate_http_deeplink(deeplink, provider)
-
-        if not http_url:
-            continue
-
-        cur.execute(
-            "UPDATE playables SET http_deeplink_url = ? WHERE event_id = ? AND playable_id = ?",
-            (http_url, event_id, playable_id),
-        )
-        updated += cur.rowcount
-
-    if updated:
-        conn.commit()
+            cur.executemany(
+                "UPDATE playables SET http_deeplink_url = ? WHERE event_id = ? AND playable_id = ?",
+                updates,
+            )
+            updated = cur.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
     log.info(f"HTTP deeplink generation complete. Updated {updated} rows.")
 
 
@@ -191,6 +263,7 @@ def migrate(db_path: Path) -> None:
         raise SystemExit(1)
 
     conn = sqlite3.connect(str(db_path))
+    tune(conn)
     adb_created = False
     http_col_created = False
     try:
@@ -198,10 +271,11 @@ def migrate(db_path: Path) -> None:
         adb_created = ensure_adb_lanes_table(conn, log)
         
         # Ensure http_deeplink_url column in playables
-        http_col_created = ensure_http_deeplink_column(conn, log)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(playables)")}
+        http_col_created = ensure_http_deeplink_column(conn, columns, log)
         
         # Optionally pre-populate HTTP deeplinks (safe/idempotent)
-        populate_http_deeplinks(conn, log)
+        populate_http_deeplinks(conn, columns, log)
             
     finally:
         conn.close()
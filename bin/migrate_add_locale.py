@@ -11,16 +11,15 @@ This migration:
 import argparse
 import sqlite3
 from pathlib import Path
+from typing import Set
 
+from db.connection import tune
 
-def ensure_locale_column(conn: sqlite3.Connection) -> bool:
-    """Add locale column to playables table if it doesn't exist"""
+
+def ensure_locale_column(conn: sqlite3.Connection, columns: Set[str]) -> bool:
+    """Add locale column to playables table if it doesn't exist (updates columns in place)"""
     cur = conn.cursor()
     
-    # Check if column exists
-    cur.execute("PRAGMA table_info(playables)")
-    columns = [row[1] for row in cur.fetchall()]
-    
     if 'locale' in columns:
         print("locale column already exists")
         return False
@@ -29,11 +28,12 @@ def ensure_locale_column(conn: sqlite3.Connection) -> bool:
     cur.execute("ALTER TABLE playables ADD COLUMN locale TEXT")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_playables_locale ON playables(locale)")
     conn.commit()
+    columns.add('locale')
     print("locale column added successfully")
     return True
 
 
-def populate_locale_for_espn(conn: sqlite3.Connection) -> int:
+def populate_locale_for_espn(conn: sqlite3.Connection, columns: Set[str]) -> int:
     """
     Populate locale column for ESPN playables that are missing it.
     
@@ -47,9 +47,6 @@ def populate_locale_for_espn(conn: sqlite3.Connection) -> int:
     cur = conn.cursor()
     
     # Check if locale column exists
-    cur.execute("PRAGMA table_info(playables)")
-    columns = {row[1] for row in cur.fetchall()}
-    
     if 'locale' not in columns:
         print("locale column doesn't exist, skipping population")
         return 0
@@ -62,76 +59,39 @@ def populate_locale_for_espn(conn: sqlite3.Connection) -> int:
     # Check if service_name column exists (added in recent migration)
     has_service_name = 'service_name' in columns
     
-    # Build query based on available columns
+    # Classify in SQL rather than round-tripping every row through Python.
+    # LIKE is case-insensitive for ASCII only, so both cases of the "ñ" are
+    # spelled out to match what str.lower() would have caught.
+    missing = """
+        logical_service IN ('espn_plus', 'espn_linear')
+          AND (locale IS NULL OR locale = '')
+    """
+    spanish = "(title LIKE '%español%' OR title LIKE '%espaÑol%')"
     if has_service_name:
-        query = """
-            SELECT event_id, playable_id, service_name, title
-            FROM playables
-            WHERE logical_service IN ('espn_plus', 'espn_linear')
-              AND (locale IS NULL OR locale = '')
-        """
-    else:
-        # Fallback: use title only
-        query = """
-            SELECT event_id, playable_id, title
-            FROM playables
-            WHERE logical_service IN ('espn_plus', 'espn_linear')
-              AND (locale IS NULL OR locale = '')
-        """
+        spanish = f"(service_name LIKE '%deportes%' OR {spanish})"
     
     try:
-        cur.execute(query)
-        rows = cur.fetchall()
+        cur.execute(f"UPDATE playables SET locale = 'es_MX' WHERE {missing} AND {spanish}")
+        spanish_count = cur.rowcount
+        cur.execute(f"UPDATE playables SET locale = 'en_US' WHERE {missing}")
+        english_count = cur.rowcount
     except sqlite3.OperationalError as e:
         # Handle case where table exists but is empty or missing columns
-        print(f"Could not query playables: {e}")
+        conn.rollback()
+        print(f"Could not update playables: {e}")
         return 0
+    conn.commit()
     
-    if not rows:
+    total = spanish_count + english_count
+    if not total:
         print("All ESPN playables have locale populated (or no ESPN playables yet)")
         return 0
     
-    print(f"Found {len(rows)} ESPN playables missing locale")
-    
-    updates = []
-    for row in rows:
-        event_id = row[0]
-        playable_id = row[1]
-        
-        if has_service_name:
-            service_name = row[2]
-            title = row[3]
-        else:
-            service_name = None
-            title = row[2]
-        
-        # Determine locale
-        service_lower = (service_name or "").lower()
-        title_lower = (title or "").lower()
-        
-        if "deportes" in service_lower or "español" in title_lower:
-            locale = "es_MX"
-        else:
-            locale = "en_US"
-        
-        updates.append((locale, event_id, playable_id))
-    
-    # Apply updates
-    cur.executemany("""
-        UPDATE playables
-        SET locale = ?
-        WHERE event_id = ? AND playable_id = ?
-    """, updates)
-    conn.commit()
-    
-    spanish_count = sum(1 for u in updates if u[0] == "es_MX")
-    english_count = len(updates) - spanish_count
-    
-    print(f"Updated {len(updates)} playables:")
+    print(f"Updated {total} playables:")
     print(f"   - {english_count} marked as English (en_US)")
     print(f"   - {spanish_count} marked as Spanish (es_MX)")
     
-    return len(updates)
+    return total
 
 
 def main():
@@ -146,12 +106,14 @@ def main():
         return 1
     
     conn = sqlite3.connect(db_path)
+    tune(conn)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(playables)")}
     
     # Step 1: Ensure column exists
-    column_added = ensure_locale_column(conn)
+    column_added = ensure_locale_column(conn, columns)
     
     # Step 2: Populate locale data
-    updated_count = populate_locale_for_espn(conn)
+    updated_count = populate_locale_for_espn(conn, columns)
     
     conn.close()
     
@@ -13,6 +13,8 @@ import sqlite3
 import argparse
 from pathlib import Path
 
+from db.connection import tune
+
 
 def create_playables_table(conn: sqlite3.Connection):
     """Create playables table to store all punchout URLs per event"""
@@ -245,6 +247,7 @@ def main():
     print()
 
     conn = sqlite3.connect(str(db_path))
+    tune(conn)
 
     try:
         create_playables_table(conn)
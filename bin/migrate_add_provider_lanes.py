@@ -12,6 +12,8 @@ import sqlite3
 from pathlib import Path
 from typing import Optional
 
+from db.connection import tune
+
 
 DEFAULT_DB_PATH = Path(__file__).resolve().parents[1] / "data" / "fruit_events.db"
 
@@ -129,6 +131,7 @@ def migrate(db_path: Path) -> None:
         raise SystemExit(1)
 
     conn = sqlite3.connect(str(db_path))
+    tune(conn)
     created = False
     bootstrap_attempted = False
     existing_count = 0
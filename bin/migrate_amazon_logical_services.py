@@ -38,6 +38,8 @@ import sqlite3
 import sys
 from typing import Dict, List, Optional, Tuple
 
+from db.connection import tune
+
 
 BROADCAST_RX = re.compile(r"broadcast=(amzn1\.dv\.gti\.[^&\s]+)", re.IGNORECASE)
 CONTENT_GTI_RX = re.compile(r"[?&]gti=(amzn1\.dv\.gti\.[a-f0-9-]{36})", re.IGNORECASE)
@@ -221,6 +223,7 @@ def migrate(db_path: str) -> int:
     print()
 
     conn = sqlite3.connect(db_path)
+    tune(conn)
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
 
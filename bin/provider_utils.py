@@ -51,6 +51,11 @@ DEFAULT_PROVIDER_PRIORITY = [
     'nba', 'aiv_nba_league_pass', 'gametime', 'mlb', 'nhl', 'nflmobile',
     'aiv', 'aiv_aggregator', 'https', 'http',
 ]
+# Index of each scheme in DEFAULT_PROVIDER_PRIORITY, built once for the fallback sort key
+# (reversed so a repeated scheme keeps its first index, as list.index() did)
+_PROVIDER_PRIORITY_INDEX = {
+    scheme: i for i, scheme in reversed(list(enumerate(DEFAULT_PROVIDER_PRIORITY)))
+}
 
 
 def extract_provider_from_url(url: str) -> str:
@@ -121,10 +126,7 @@ def get_provider_priority(provider_scheme: str) -> int:
     if _CATALOG_AVAILABLE:
         p = _catalog_priority(provider_scheme)
         return p if p != 25 else 999  # 25 is the catalog default for unknowns
-    try:
-        return DEFAULT_PROVIDER_PRIORITY.index(provider_scheme)
-    except ValueError:
-        return 999
+    return _PROVIDER_PRIORITY_INDEX.get(provider_scheme, 999)
 
 
 def filter_playables_by_services(playables: list, enabled_services: list = None) -> list:
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+time_utils.py - Shared timestamp helpers for the ingestors
+
+Scraper feeds carry UTC timestamps as YYYY-MM-DDTHH:MM:SSZ, sometimes with
+fractional seconds. utc_to_ms() converts those without building a datetime
+per row, and utc_to_datetime() parses them without fromisoformat; both
+reject malformed layouts and impossible dates the way datetime does.
+"""
+
+import calendar
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+
+def _utc_fields(utc_str: str) -> Optional[Tuple[int, int, int, int, int, int, int]]:
+    """
+    Slice YYYY-MM-DDTHH:MM:SS[.ffffff]Z into (year, month, day, hour, minute,
+    second, microsecond). Returns None unless utc_str is exactly that layout
+    with ASCII digits; field ranges are left to the caller.
+    """
+    if (len(utc_str) < 20 or utc_str[-1] != "Z" or utc_str[10] != "T"
+            or utc_str[4] != "-" or utc_str[7] != "-" or utc_str[13] != ":" or utc_str[16] != ":"):
+        return None
+    if utc_str[19] == "Z":
+        if len(utc_str) != 20:
+            return None
+        frac = ""
+    elif utc_str[19] == ".":
+        frac = utc_str[20:-1]
+        if not 1 <= len(frac) <= 6:
+            return None
+    else:
+        return None
+    digits = utc_str[0:4] + utc_str[5:7] + utc_str[8:10] + utc_str[11:13] + utc_str[14:16] + utc_str[17:19] + frac
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    return (
+        int(utc_str[0:4]), int(utc_str[5:7]), int(utc_str[8:10]),
+        int(utc_str[11:13]), int(utc_str[14:16]), int(utc_str[17:19]),
+        int(frac.ljust(6, "0")) if frac else 0,
+    )
+
+
+def utc_to_ms(utc_str: str) -> int:
+    """
+    Convert an ISO8601 UTC string to milliseconds since epoch.
+
+    YYYY-MM-DDTHH:MM:SS[.ffffff]Z is sliced and fed to calendar.timegm;
+    anything else goes through datetime.fromisoformat. Raises ValueError (or
+    AttributeError/TypeError for non-strings) on bad input.
+    """
+    fields = _utc_fields(utc_str)
+    if fields is not None:
+        year, month, day, hour, minute, second, micro = fields
+        # timegm normalizes out-of-range fields (Feb 31 -> Mar 3); leave
+        # those to fromisoformat so they raise instead
+        if (year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+                and hour < 24 and minute < 60 and second < 60):
+            return calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0)) * 1000 + micro // 1000
+    return int(datetime.fromisoformat(utc_str.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+def utc_to_datetime(utc_str: str) -> datetime:
+    """
+    Parse an ISO8601 UTC string into an aware UTC datetime.
+
+    Same fast layout as utc_to_ms; anything else (or out of range) goes
+    through datetime.fromisoformat. Raises ValueError on bad input.
+    """
+    fields = _utc_fields(utc_str)
+    if fields is not None:
+        try:
+            return datetime(*fields, tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(utc_str.replace("Z", "+00:00"))
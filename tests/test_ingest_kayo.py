@@ -0,0 +1,127 @@
+import importlib.util
+import json
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+BIN_DIR = Path(__file__).resolve().parents[1] / "bin"
+
+
+def _load_ingest_kayo_module():
+    module_name = "ingest_kayo_under_test"
+    script_path = BIN_DIR / "ingest_kayo.py"
+
+    # ingest_kayo imports its sibling helpers (time_utils, logical_service_mapper)
+    added_path = str(BIN_DIR) not in sys.path
+    if added_path:
+        sys.path.insert(0, str(BIN_DIR))
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, script_path)
+        module = importlib.util.module_from_spec(spec)
+        assert spec.loader is not None
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.modules.pop(module_name, None)
+        if added_path:
+            sys.path.remove(str(BIN_DIR))
+
+
+ingest_kayo = _load_ingest_kayo_module()
+
+EVENTS = [
+    {"external_id": "1", "title": "First", "playables": [{"provider": "kayo"}]},
+    {"external_id": "2", "title": "Second", "start_utc": "2025-01-01T00:00:00Z"},
+]
+
+
+class IterEventsTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "kayo_raw.json"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _events(self):
+        return list(ingest_kayo.iter_events(self.path))
+
+    def test_reads_jsonl_with_header_line(self):
+        lines = [{"source": "kayo", "generated_utc": "2025-01-01T00:00:00+00:00"}] + EVENTS
+        self.path.write_text("\n".join(json.dumps(obj) for obj in lines) + "\n\n", encoding="utf-8")
+
+        self.assertEqual(self._events(), EVENTS)
+
+    def test_reads_legacy_pretty_printed_json(self):
+        self.path.write_text(json.dumps({"events": EVENTS}, indent=2), encoding="utf-8")
+
+        self.assertEqual(self._events(), EVENTS)
+        with mock.patch.object(ingest_kayo, "ijson", None):
+            self.assertEqual(self._events(), EVENTS)
+
+    def test_reads_legacy_single_line_json(self):
+        self.path.write_text(json.dumps({"source": "kayo", "events": EVENTS}), encoding="utf-8")
+
+        # The first readline() already holds the whole document; no second parse
+        fake_ijson = mock.Mock()
+        with mock.patch.object(ingest_kayo, "ijson", fake_ijson):
+            self.assertEqual(self._events(), EVENTS)
+        fake_ijson.items.assert_not_called()
+
+
+class BulkUpsertEventsTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute(
+            f"CREATE TABLE events ({', '.join(ingest_kayo.EVENT_COLUMNS)}, PRIMARY KEY(id))"
+        )
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _row(self, event_id, title, raw_hash, last_seen):
+        row = dict.fromkeys(ingest_kayo.EVENT_COLUMNS)
+        row.update(id=event_id, title=title, raw_hash=raw_hash, last_seen_utc=last_seen)
+        return row
+
+    def _stored(self):
+        return self.conn.execute(
+            "SELECT id, title, raw_hash, last_seen_utc FROM events ORDER BY id"
+        ).fetchall()
+
+    def test_unchanged_hash_only_bumps_last_seen(self):
+        ingest_kayo.bulk_upsert_events(self.conn, [
+            self._row("kayo-1", "Old title", "h1", "t1"),
+            self._row("kayo-2", "Other", "h2", "t1"),
+        ])
+
+        # Same hash, different payload: the row must not be rewritten
+        ingest_kayo.bulk_upsert_events(self.conn, [
+            self._row("kayo-1", "New title", "h1", "t2"),
+        ])
+
+        self.assertEqual(self._stored(), [
+            ("kayo-1", "Old title", "h1", "t2"),
+            ("kayo-2", "Other", "h2", "t1"),
+        ])
+
+    def test_changed_hash_and_new_ids_are_upserted(self):
+        ingest_kayo.bulk_upsert_events(self.conn, [self._row("kayo-1", "Old title", "h1", "t1")])
+
+        ingest_kayo.bulk_upsert_events(self.conn, [
+            self._row("kayo-1", "New title", "h1b", "t2"),
+            self._row("kayo-3", "Brand new", "h3", "t2"),
+        ])
+
+        self.assertEqual(self._stored(), [
+            ("kayo-1", "New title", "h1b", "t2"),
+            ("kayo-3", "Brand new", "h3", "t2"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
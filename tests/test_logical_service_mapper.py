@@ -0,0 +1,183 @@
+import importlib.util
+import json
+import re
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+
+BIN_DIR = Path(__file__).resolve().parents[1] / "bin"
+
+
+def _load_mapper_module():
+    module_name = "logical_service_mapper_under_test"
+    script_path = BIN_DIR / "logical_service_mapper.py"
+
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.modules.pop(module_name, None)
+
+
+mapper = _load_mapper_module()
+
+GTI_A = "amzn1.dv.gti.11111111-2222-3333-4444-555555555555"
+GTI_B = "amzn1.dv.gti.aaaaaaaa-bbbb-cccc-dddd-eeeeeeeeeeee"
+
+# The regex extraction extract_gti_from_deeplink used before the str.find rewrite
+_OLD_BROADCAST_RE = re.compile(r"broadcast=(amzn1\.dv\.gti\.[0-9a-f-]{36})")
+_OLD_GTI_RE = re.compile(r"[?&]gti=(amzn1\.dv\.gti\.[0-9a-f-]{36})")
+
+
+def _old_extract_gti(deeplink):
+    if not deeplink:
+        return None
+    match = _OLD_BROADCAST_RE.search(deeplink) or _OLD_GTI_RE.search(deeplink)
+    return match.group(1) if match else None
+
+
+def _league(value):
+    return json.dumps([{"type": "sport", "value": "x"}, {"type": "league", "value": value}])
+
+
+def _make_db():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(
+        """
+        CREATE TABLE events(id TEXT PRIMARY KEY, classification_json TEXT, end_utc TEXT);
+        CREATE TABLE playables(event_id TEXT, playable_id TEXT, provider TEXT, deeplink_play TEXT,
+            deeplink_open TEXT, playable_url TEXT, service_name TEXT, logical_service TEXT,
+            PRIMARY KEY(event_id, playable_id));
+        CREATE TABLE amazon_channels(gti TEXT, channel_id TEXT, is_stale INTEGER);
+        CREATE TABLE amazon_services(amazon_channel_id TEXT, logical_service TEXT);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO amazon_channels VALUES (?, ?, ?)",
+        [(GTI_A, "c1", 0), (GTI_B, "c2", 1)],
+    )
+    conn.executemany(
+        "INSERT INTO amazon_services VALUES (?, ?)",
+        [("c1", "aiv_peacock"), ("c2", "aiv_dazn")],
+    )
+    conn.executemany(
+        "INSERT INTO events VALUES (?, ?, ?)",
+        [
+            ("mls", _league("MLS"), "2999-01-01T00:00:00Z"),
+            ("nba", _league("NBA"), "2999-01-01T00:00:00Z"),
+            ("misc", _league("Premier League"), "2999-01-01T00:00:00Z"),
+            ("past", _league("MLS"), "2000-01-01T00:00:00Z"),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO playables VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("misc", "p1", "peacock", None, None, None, None, "peacock"),
+            ("misc", "p2", "https", "https://www.peacocktv.com/watch/1", None, None, None, None),
+            ("misc", "p3", "https", "https://play.hbomax.com/a", None, None, None, ""),
+            ("misc", "p4", "http", None, "", "https://user:pw@tubitv.com:443/x", None, None),
+            ("misc", "p5", "https", "https://unknown.example.com/a", None, None, None, None),
+            ("mls", "p6", "https", "https://tv.apple.com/us/sporting-event/1", None, None, None, None),
+            ("nba", "p7", "https", "https://tv.apple.com/us/sporting-event/2", None, None, None, None),
+            ("misc", "p8", "https", "https://tv.apple.com/us/sporting-event/3", None, None, None, None),
+            ("misc", "p9", "aiv", "aiv://x?broadcast=" + GTI_A, None, None, None, None),
+            ("misc", "p10", "aiv", "aiv://x?gti=" + GTI_B, None, None, None, None),
+            ("misc", "p11", "sportscenter", "sportscenter://x", None, None, "ESPN+", None),
+            ("misc", "p12", "sportscenter", "sportscenter://y", None, None, "ESPN2", None),
+            ("misc", "p13", "kayo", "https://kayosports.com.au/fixture/1", None, None, None, None),
+            ("past", "p14", "https", "https://www.peacocktv.com/watch/2", None, None, None, None),
+            ("misc", "p15", "https", "https://www.peacocktv.com/watch/3", None, None, None, None),
+        ],
+    )
+    conn.commit()
+    return conn
+
+
+class LookupHostTests(unittest.TestCase):
+    def test_exact_and_subdomain_hosts_match_their_parent_domain(self):
+        self.assertEqual(mapper._lookup_host("peacocktv.com"), "peacock_web")
+        self.assertEqual(mapper._lookup_host("www.peacocktv.com"), "peacock_web")
+        self.assertEqual(mapper._lookup_host("play.hbomax.com"), "max")
+        self.assertEqual(mapper._lookup_host("a.b.watch.nesn.com"), "nesn_web")
+
+    def test_port_is_ignored(self):
+        self.assertEqual(mapper._lookup_host("tubitv.com:443"), "tubi")
+        self.assertEqual(mapper._lookup_host("www.max.com:8080"), "max")
+
+    def test_userinfo_is_ignored(self):
+        self.assertEqual(mapper._lookup_host("user:pw@tubitv.com"), "tubi")
+        self.assertEqual(mapper._lookup_host("user@www.peacocktv.com:443"), "peacock_web")
+
+    def test_unlisted_and_lookalike_hosts_do_not_match(self):
+        self.assertIsNone(mapper._lookup_host("unknown.example.com"))
+        self.assertIsNone(mapper._lookup_host("notpeacocktv.com"))
+        self.assertIsNone(mapper._lookup_host("nesn.com"))
+        self.assertIsNone(mapper._lookup_host("com"))
+
+
+class FindGtiTests(unittest.TestCase):
+    DEEPLINKS = [
+        None,
+        "",
+        "aiv://x?broadcast=" + GTI_A,
+        "https://app.primevideo.com/detail?gti=" + GTI_B + "&x=1",
+        "aiv://x?foo=1&gti=" + GTI_A,
+        "aiv://x?xgti=" + GTI_A,
+        "aiv://x?broadcast=" + GTI_A + "&gti=" + GTI_B,
+        "aiv://x?gti=" + GTI_B + "&broadcast=" + GTI_A,
+        "aiv://x?broadcast=amzn1.dv.gti.ZZZZ&gti=" + GTI_B,
+        "aiv://x?broadcast=" + GTI_A.upper(),
+        "aiv://x?gti=" + GTI_A[:-1],
+        "aiv://x?broadcast=" + GTI_A[:20] + "&broadcast=" + GTI_B,
+        "aiv://x?notbroadcast=" + GTI_A,
+        "gti=" + GTI_A,
+    ]
+
+    def test_matches_old_regex_extraction(self):
+        for deeplink in self.DEEPLINKS:
+            with self.subTest(deeplink=deeplink):
+                self.assertEqual(mapper.extract_gti_from_deeplink(deeplink), _old_extract_gti(deeplink))
+
+    def test_find_gti_requires_separator_only_when_asked(self):
+        self.assertEqual(mapper._find_gti("aiv://x?xgti=" + GTI_A, "gti", False), GTI_A)
+        self.assertIsNone(mapper._find_gti("aiv://x?xgti=" + GTI_A, "gti", True))
+        self.assertEqual(mapper._find_gti("aiv://x?xgti=1&gti=" + GTI_B, "gti", True), GTI_B)
+
+
+class LogicalServiceCountsTests(unittest.TestCase):
+    def test_counts_match_baseline(self):
+        conn = _make_db()
+        try:
+            counts = mapper.get_all_logical_services_with_counts(conn)
+        finally:
+            conn.close()
+
+        # Same as the pre-rewrite per-row mapper, except the userinfo/port
+        # tubitv.com link, which used to fall through to "https"
+        self.assertEqual(
+            counts,
+            {
+                "aiv_aggregator": 1,
+                "aiv_peacock": 1,
+                "apple_mls": 1,
+                "apple_nba": 1,
+                "apple_other": 1,
+                "espn_linear": 1,
+                "espn_plus": 1,
+                "https": 1,
+                "kayo_web": 1,
+                "max": 1,
+                "peacock": 1,
+                "peacock_web": 2,
+                "tubi": 1,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
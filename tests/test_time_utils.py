@@ -0,0 +1,78 @@
+import importlib.util
+import sys
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+BIN_DIR = Path(__file__).resolve().parents[1] / "bin"
+
+
+def _load_time_utils_module():
+    module_name = "time_utils_under_test"
+    script_path = BIN_DIR / "time_utils.py"
+
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.modules.pop(module_name, None)
+
+
+time_utils = _load_time_utils_module()
+
+MALFORMED = [
+    "2025x01x01T19:00:00Z",
+    "2025-01-01T19-00-00Z",
+    "2025-01-01T19:00:00ZZ",
+    "2025-02-31T19:00:00Z",
+    "2023-02-29T19:00:00Z",
+    "2025-01-01T24:00:00Z",
+    "not a timestamp",
+]
+
+
+class UtcToMsTests(unittest.TestCase):
+    def test_fixed_layout(self):
+        self.assertEqual(time_utils.utc_to_ms("2025-01-01T19:00:00Z"), 1735758000000)
+        self.assertEqual(time_utils.utc_to_ms("2024-02-29T00:00:00Z"), 1709164800000)
+
+    def test_fractional_seconds_keep_milliseconds(self):
+        self.assertEqual(time_utils.utc_to_ms("2025-01-01T19:00:00.5Z"), 1735758000500)
+        self.assertEqual(time_utils.utc_to_ms("2025-01-01T19:00:00.123456Z"), 1735758000123)
+
+    def test_other_iso_layouts_fall_back_to_fromisoformat(self):
+        self.assertEqual(time_utils.utc_to_ms("2025-01-01T20:00:00+01:00"), 1735758000000)
+
+    def test_malformed_or_impossible_dates_raise(self):
+        for value in MALFORMED:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    time_utils.utc_to_ms(value)
+
+
+class UtcToDatetimeTests(unittest.TestCase):
+    def test_fixed_layout_is_aware_utc(self):
+        self.assertEqual(
+            time_utils.utc_to_datetime("2025-01-01T19:00:00.25Z"),
+            datetime(2025, 1, 1, 19, 0, 0, 250000, tzinfo=timezone.utc),
+        )
+
+    def test_other_iso_layouts_fall_back_to_fromisoformat(self):
+        self.assertEqual(
+            time_utils.utc_to_datetime("2025-01-01T20:00:00+01:00"),
+            datetime(2025, 1, 1, 19, 0, 0, tzinfo=timezone.utc),
+        )
+
+    def test_malformed_or_impossible_dates_raise(self):
+        for value in MALFORMED:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    time_utils.utc_to_datetime(value)
+
+
+if __name__ == "__main__":
+    unittest.main()